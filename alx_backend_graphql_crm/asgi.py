@@ -0,0 +1,14 @@
+"""
+ASGI config for alx_backend_graphql_crm project.
+
+Serve with an ASGI server, e.g. ``uvicorn alx_backend_graphql_crm.asgi:application``,
+to use the async GraphQL endpoint at /graphql-async.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql_crm.settings')
+
+application = get_asgi_application()
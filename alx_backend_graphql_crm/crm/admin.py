@@ -1,9 +1,19 @@
 # crm/admin.py
 from django.contrib import admin
-from .models import Customer
+from crm.models import Customer
+from crm.search import get_backend
+
+# Customers listed for one admin search, best ranked first.
+ADMIN_SEARCH_LIMIT = 1000
 
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
-    list_display = ['first_name', 'last_name', 'email', 'created_at']
-    search_fields = ['first_name', 'last_name', 'email']
-    list_filter = ['created_at']
+    list_display = ['name', 'email', 'phone']
+    search_fields = ['name', 'email', 'phone']
+
+    def get_search_results(self, request, queryset, search_term):
+        # The search index instead of an icontains scan of every search field.
+        if not search_term.strip():
+            return queryset, False
+        hits = get_backend().search(search_term, ADMIN_SEARCH_LIMIT)
+        return queryset.filter(pk__in=[pk for _, pk in hits]), False
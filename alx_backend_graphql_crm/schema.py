@@ -1,8 +1,20 @@
 import graphene
 import crm.schema
+import graphql_crm.schema
 
 class Query(crm.schema.Query, graphene.ObjectType):
     # This will inherit from the CRM app's Query class
     pass
 
-schema = graphene.Schema(query=Query)
+class AsyncQuery(crm.schema.AsyncQuery, graphene.ObjectType):
+    # Same fields with async resolvers, for the ASGI endpoint
+    class Meta:
+        name = "Query"
+
+class Mutation(crm.schema.Mutation, graphql_crm.schema.Mutation, graphene.ObjectType):
+    # The CRM app's mutations, for clients and for the jobs in crm/cron.py,
+    # and the create and bulk-create mutations of graphql_crm
+    pass
+
+schema = graphene.Schema(query=Query, mutation=Mutation)
+async_schema = graphene.Schema(query=AsyncQuery, mutation=Mutation)
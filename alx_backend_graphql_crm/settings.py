@@ -53,6 +53,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'alx_backend_graphql_crm.wsgi.application'
+ASGI_APPLICATION = 'alx_backend_graphql_crm.asgi.application'
 
 DATABASES = {
     'default': {
@@ -1,9 +1,13 @@
 from django.contrib import admin
 from django.urls import path
-from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
+from crm.views import AsyncCRMGraphQLView, CRMGraphQLView, metrics_view
+from alx_backend_graphql_crm.schema import async_schema
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path("graphql", csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path("graphql", csrf_exempt(CRMGraphQLView.as_view(graphiql=True))),
+    # Needs an ASGI server (alx_backend_graphql_crm/asgi.py)
+    path("graphql-async", csrf_exempt(AsyncCRMGraphQLView.as_view(schema=async_schema, graphiql=True))),
+    path("metrics", metrics_view),
 ]
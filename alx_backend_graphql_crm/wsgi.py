@@ -0,0 +1,11 @@
+"""
+WSGI config for alx_backend_graphql_crm project.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql_crm.settings')
+
+application = get_wsgi_application()
@@ -0,0 +1,162 @@
+"""Compare the ASGI GraphQL endpoint with the WSGI one under concurrent load.
+
+Both applications are driven in-process against a throwaway SQLite
+database, so the numbers compare the two serving models rather than a
+network stack. The WSGI view runs on a fixed pool of worker threads, as
+under a threaded WSGI server; the ASGI view runs on the event loop:
+
+    python benchmarks/bench_asgi.py --clients 50,200,1000 --requests 2000
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql_crm.settings')
+
+QUERY = '''
+{
+  totalCustomers
+  totalOrders
+  totalRevenue
+  orders(first: 20) {
+    totalCount
+    edges { node { id totalAmount customer { name } products { name price } } }
+  }
+}
+'''
+
+
+def setup_database(path):
+    from django.conf import settings
+    settings.DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+
+def call_wsgi(application, body):
+    environ = {
+        'REQUEST_METHOD': 'POST',
+        'PATH_INFO': '/graphql',
+        'QUERY_STRING': '',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.url_scheme': 'http',
+        'wsgi.errors': sys.stderr,
+    }
+    status = []
+    response = application(environ, lambda s, headers, exc_info=None: status.append(s))
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return int(status[0].split()[0])
+
+
+async def call_asgi(application, body):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'POST',
+        'scheme': 'http',
+        'path': '/graphql-async',
+        'raw_path': b'/graphql-async',
+        'root_path': '',
+        'query_string': b'',
+        'headers': [
+            (b'host', b'localhost'),
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    status = []
+
+    async def receive():
+        return messages.pop() if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+async def drive(call, clients, requests):
+    """Run ``requests`` calls from ``clients`` concurrent clients; return (rps, p99 ms)."""
+    latencies = []
+    remaining = requests
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            status = await call()
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                raise SystemExit(f'request failed with status {status}')
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, statistics.quantiles(latencies, n=100)[98] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', default='50,200,1000',
+                        help='comma-separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=2000, help='requests per run')
+    parser.add_argument('--wsgi-threads', type=int, default=8,
+                        help='worker threads serving the WSGI view')
+    parser.add_argument('--orders', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_database(os.path.join(tmp, 'bench.sqlite3'))
+        import seed_db
+        seed_db.seed(customers=200, products=100, orders=args.orders, clear=False)
+
+        from django.core.asgi import get_asgi_application
+        from django.core.wsgi import get_wsgi_application
+
+        wsgi_application = get_wsgi_application()
+        asgi_application = get_asgi_application()
+        body = json.dumps({'query': QUERY}).encode()
+
+        print(f'{args.requests} requests per run, WSGI on {args.wsgi_threads} threads')
+        print(f'{"clients":>8}  {"WSGI req/s":>10}  {"WSGI p99":>10}  {"ASGI req/s":>10}  {"ASGI p99":>10}')
+        for clients in (int(value) for value in args.clients.split(',')):
+            with ThreadPoolExecutor(args.wsgi_threads) as pool:
+                async def wsgi():
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(pool, call_wsgi, wsgi_application, body)
+
+                wsgi_rps, wsgi_p99 = asyncio.run(drive(wsgi, clients, args.requests))
+            asgi_rps, asgi_p99 = asyncio.run(
+                drive(lambda: call_asgi(asgi_application, body), clients, args.requests)
+            )
+            print(f'{clients:>8}  {wsgi_rps:>10.1f}  {wsgi_p99:>8.1f}ms  {asgi_rps:>10.1f}  {asgi_p99:>8.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Compare bulkCreateOrders with looping over createOrder.
+
+Runs against a throwaway SQLite database, so it can be pointed at any
+checkout:
+
+    python benchmarks/bench_bulk_orders.py --orders 1000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql_crm.settings')
+
+
+def setup_database(path):
+    from django.conf import settings
+    settings.DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+
+def timed(schema, query, variables):
+    from django.db import connection
+
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        result = schema.execute(query, variable_values=variables)
+        elapsed = time.perf_counter() - start
+    if result.errors:
+        raise SystemExit(result.errors)
+    return elapsed, len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=1000)
+    parser.add_argument('--products-per-order', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_database(os.path.join(tmp, 'bench.sqlite3'))
+
+        import graphene
+        import crm.schema
+        import graphql_crm.schema
+        from crm.models import Customer, Product
+
+        schema = graphene.Schema(query=crm.schema.Query, mutation=graphql_crm.schema.Mutation)
+        customers = Customer.objects.bulk_create(
+            Customer(name=f'Customer {i}', email=f'customer{i}@example.com') for i in range(100)
+        )
+        products = Product.objects.bulk_create(
+            Product(name=f'Product {i}', price=Decimal('9.99'), stock=100) for i in range(50)
+        )
+        inputs = [
+            {
+                'customerId': customers[i % len(customers)].pk,
+                'productIds': [
+                    products[(i + j) % len(products)].pk for j in range(args.products_per_order)
+                ],
+            }
+            for i in range(args.orders)
+        ]
+
+        single = 'mutation($input: OrderInput!) { createOrder(input: $input) { success } }'
+        loop_time = loop_queries = 0
+        for row in inputs:
+            elapsed, queries = timed(schema, single, {'input': row})
+            loop_time += elapsed
+            loop_queries += queries
+
+        bulk = 'mutation($inputs: [OrderInput]!) { bulkCreateOrders(inputs: $inputs) { successCount } }'
+        bulk_time, bulk_queries = timed(schema, bulk, {'inputs': inputs})
+
+    print(f'{args.orders} orders, {args.products_per_order} products each')
+    print(f'createOrder x {args.orders}: {loop_time:8.3f} s  {loop_queries:7d} queries')
+    print(f'bulkCreateOrders:     {bulk_time:8.3f} s  {bulk_queries:7d} queries')
+    print(f'speed-up: {loop_time / bulk_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
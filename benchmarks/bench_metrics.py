@@ -0,0 +1,70 @@
+"""Measure what the Prometheus metrics add to one GraphQL operation.
+
+Times the metrics calls a typical /graphql query makes -- the operation
+sample, a document cache lookup, a connection's rows and five counted SQL
+statements -- against the same loop without them. Run it once as is and
+once in multiprocess mode, as under gunicorn:
+
+    python benchmarks/bench_metrics.py
+    PROMETHEUS_MULTIPROC_DIR=$(mktemp -d) python benchmarks/bench_metrics.py
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql_crm.settings')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--operations', type=int, default=100000)
+    args = parser.parse_args()
+
+    django.setup()
+    from graphql import ExecutionResult, parse
+
+    from crm.metrics import MULTIPROCESS_ENV, OperationMetrics, _count_sql, record_cache_lookup, record_rows_returned
+
+    class BenchConnection:
+        pass
+
+    operation_ast = parse('query Bench { hello }').definitions[0]
+    result = ExecutionResult(data={'hello': 'Hello, GraphQL!'})
+
+    def execute(sql, params, many, context):
+        return None
+
+    def plain():
+        for _ in range(5):
+            execute('SELECT 1', (), False, None)
+
+    def measured():
+        with OperationMetrics() as metrics:
+            metrics.operation_ast = operation_ast
+            record_cache_lookup('document', True)
+            for _ in range(5):
+                _count_sql(execute, 'SELECT 1', (), False, None)
+            record_rows_returned(BenchConnection, 20)
+            metrics.result = result
+
+    timings = {}
+    for name, operation in (('without metrics', plain), ('with metrics', measured)):
+        operation()
+        start = time.perf_counter()
+        for _ in range(args.operations):
+            operation()
+        timings[name] = (time.perf_counter() - start) / args.operations
+
+    mode = 'multiprocess' if os.environ.get(MULTIPROCESS_ENV) else 'single process'
+    print(f'{args.operations} operations, {mode} mode')
+    for name, seconds in timings.items():
+        print(f'{name:<16} {seconds * 1e6:>7.2f}us')
+    print(f'{"overhead":<16} {(timings["with metrics"] - timings["without metrics"]) * 1e6:>7.2f}us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Time searchCustomers prefix searches over a million customers.
+
+Seeds --customers customers with seed_db.py into a throwaway SQLite
+database, then runs every query --repeat times, both through the search
+backend alone and as a searchCustomers(first: 20) operation whose
+document is parsed once, as the /graphql document cache does. Exits
+non-zero when the median of an operation takes longer than --budget-ms:
+
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --customers 100000 --queries "jo,smith,gmail"
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql_crm.settings')
+
+# Short and long prefixes, a first name and a surname, two words, mail
+# domains found in about a third of the emails, and phone digits.
+QUERIES = 'a,jo,mar,john,john sm,smith,will,gmail,hotmail,yahoo,555,1'
+
+OPERATION = '''
+query Search($query: String!) {
+  searchCustomers(query: $query, first: 20) {
+    edges { cursor node { id name email phone } }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+'''
+
+
+def setup_database(path):
+    from django.conf import settings
+    settings.DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+
+def median_ms(function, repeat):
+    function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, max(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--customers', type=int, default=1000000)
+    parser.add_argument('--queries', default=QUERIES, help='comma-separated search queries')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per query')
+    parser.add_argument('--budget-ms', type=float, default=10.0,
+                        help='fail when a median is slower than this (default 10)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_database(os.path.join(tmp, 'bench.sqlite3'))
+        import seed_db
+        seed_db.seed(customers=args.customers, products=0, orders=0, clear=False)
+
+        from graphql import execute, parse
+
+        import crm.schema
+        from crm.search import get_backend
+
+        backend = get_backend()
+        schema = crm.schema.schema.graphql_schema
+        document = parse(OPERATION)
+        print(f'{args.customers} customers, {type(backend).__name__}, median (max) of {args.repeat} runs')
+        print(f'{"query":<10} {"hits":>5} {"backend":>17} {"searchCustomers":>17}')
+        over_budget = []
+        for query in args.queries.split(','):
+            hits = len(backend.search(query, 21))
+            search = median_ms(lambda: backend.search(query, 21), args.repeat)
+
+            def operation():
+                result = execute(schema, document, variable_values={'query': query})
+                if result.errors:
+                    raise SystemExit(result.errors)
+
+            resolved = median_ms(operation, args.repeat)
+            print(f'{query:<10} {hits:>5} {search[0]:>8.2f} ({search[1]:>5.2f}) '
+                  f'{resolved[0]:>8.2f} ({resolved[1]:>5.2f})')
+            if resolved[0] > args.budget_ms:
+                over_budget.append(query)
+
+        if over_budget:
+            raise SystemExit(f'Slower than {args.budget_ms}ms: {", ".join(over_budget)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""Benchmark every GraphQL operation against 10k, 100k and 1M-order datasets.
+
+Each dataset size is seeded into its own throwaway SQLite database, in a
+child process, and every operation records its median wall time, SQL
+query count and tracemalloc peak. Results are written as JSON; passing the
+JSON of an earlier commit as --baseline fails the run when an operation
+got slower or hungrier than --threshold allows, or issues more queries:
+
+    python benchmarks/bench_suite.py --output before.json
+    git checkout feature
+    python benchmarks/bench_suite.py --baseline before.json --output after.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import timedelta
+from types import SimpleNamespace
+
+import django
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql_crm.settings')
+
+# Timings below this many milliseconds are too noisy to compare.
+MIN_COMPARABLE_MS = 1.0
+
+OPERATIONS = {
+    'customers_nested': '''
+        { customers(first: 50) { totalCount edges { node {
+            name email orderSet { id totalAmount products { name price } }
+        } } } }
+    ''',
+    'products_nested': '''
+        { products(first: 50) { totalCount edges { node {
+            name price stock orderSet { id totalAmount }
+        } } } }
+    ''',
+    'orders_nested': '''
+        { orders(first: 100) { totalCount edges { node {
+            id orderDate totalAmount customer { name email } products { name price }
+        } } } }
+    ''',
+    'orders_recent': '''
+        query($since: DateTime!) {
+          orders(orderDateGte: $since, orderBy: ORDER_DATE_DESC, first: 100) {
+            edges { node { id orderDate totalAmount customer { name } } }
+          }
+        }
+    ''',
+    'totals': '{ totalCustomers totalOrders totalRevenue }',
+    'crm_report': '''
+        { crmReport(period: MONTH) {
+            customerCount orderCount revenue periods { start orderCount revenue }
+        } }
+    ''',
+    'create_order': '''
+        mutation($input: OrderInput!) { createOrder(input: $input) { success message } }
+    ''',
+    'bulk_create_customers': '''
+        mutation($inputs: [CustomerInput]!) {
+          bulkCreateCustomers(inputs: $inputs) { successCount errors }
+        }
+    ''',
+    'update_low_stock_products': '''
+        mutation { updateLowStockProducts(increment: 1) { success updatedProducts } }
+    ''',
+}
+
+
+def setup_database(path):
+    from django.conf import settings
+    settings.DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+
+def seed(orders):
+    """Seed ``orders`` orders, a tenth as many customers and a hundredth as many
+    products with seed_db.py, from a fixed seed; return the customer and product ids."""
+    from django.db import connection
+
+    import seed_db
+    from crm.models import Customer, Product
+
+    # The worker's stdout carries the JSON results.
+    with redirect_stdout(sys.stderr):
+        seed_db.seed(
+            customers=max(orders // 10, 1), products=max(orders // 100, 10), orders=orders,
+            seed=0, products_per_order=3, clear=False,
+        )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return (
+        list(Customer.objects.values_list('pk', flat=True)),
+        list(Product.objects.values_list('pk', flat=True)),
+    )
+
+
+def build_schema():
+    import graphene
+
+    import crm.schema
+    import graphql_crm.schema
+
+    class Mutation(crm.schema.Mutation, graphql_crm.schema.Mutation):
+        pass
+
+    return graphene.Schema(query=crm.schema.Query, mutation=Mutation)
+
+
+def variables_for(name, customer_ids, product_ids, rng, run):
+    if name == 'orders_recent':
+        from django.utils import timezone
+        return {'since': (timezone.now() - timedelta(days=7)).isoformat()}
+    if name == 'create_order':
+        return {'input': {
+            'customerId': rng.choice(customer_ids),
+            'productIds': rng.sample(product_ids, 3),
+        }}
+    if name == 'bulk_create_customers':
+        return {'inputs': [
+            {'name': f'Bench customer {i}', 'email': f'bench-{run}-{i}@example.com'}
+            for i in range(100)
+        ]}
+    return None
+
+
+def measure(schema, query, variables, trace_memory=False):
+    """Run ``query`` once; return (seconds, SQL statements, peak bytes or None)."""
+    from django.db import connection
+
+    statements = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal statements
+        statements += 1
+        return execute(sql, params, many, context)
+
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            # A context object gives the resolvers somewhere to keep their loaders.
+            result = schema.execute(query, variable_values=variables, context_value=SimpleNamespace())
+            elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    if result.errors:
+        raise SystemExit(f'{query.strip()[:60]}...: {result.errors}')
+    return elapsed, statements, peak
+
+
+def run_size(size, repeat, operations):
+    """Seed one database of ``size`` orders and measure every operation on it."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_database(os.path.join(tmp, 'bench.sqlite3'))
+        start = time.perf_counter()
+        customer_ids, product_ids = seed(size)
+        print(f'seeded {size} orders in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+
+        schema = build_schema()
+        rng = random.Random(1)
+        for name in operations:
+            query = OPERATIONS[name]
+            times = []
+            statements = None
+            # The first run warms the document cache and is left out of the timings.
+            for run in range(repeat + 1):
+                variables = variables_for(name, customer_ids, product_ids, rng, run)
+                elapsed, count, _ = measure(schema, query, variables)
+                if run:
+                    times.append(elapsed)
+                    statements = count
+            # Measured on its own run: tracing allocations slows everything down.
+            variables = variables_for(name, customer_ids, product_ids, rng, 'memory')
+            _, _, peak = measure(schema, query, variables, trace_memory=True)
+            results[name] = {
+                'time_ms': round(statistics.median(times) * 1000, 3),
+                'queries': statements,
+                'peak_kib': round(peak / 1024, 1),
+            }
+            print(f'{size:>9} {name:<26} {results[name]["time_ms"]:>10.2f}ms '
+                  f'{statements:>5} queries {results[name]["peak_kib"]:>10.1f}KiB', file=sys.stderr)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, current, threshold):
+    """Return a line for every measurement in ``current`` that regressed from ``baseline``."""
+    regressions = []
+    for size, operations in current['results'].items():
+        for name, now in operations.items():
+            before = baseline.get('results', {}).get(size, {}).get(name)
+            if before is None:
+                continue
+            if now['queries'] > before['queries']:
+                regressions.append(f'{size} {name}: {before["queries"]} -> {now["queries"]} queries')
+            if (now['time_ms'] >= MIN_COMPARABLE_MS
+                    and now['time_ms'] > before['time_ms'] * (1 + threshold)):
+                regressions.append(f'{size} {name}: {before["time_ms"]} -> {now["time_ms"]} ms')
+            if now['peak_kib'] > before['peak_kib'] * (1 + threshold):
+                regressions.append(f'{size} {name}: {before["peak_kib"]} -> {now["peak_kib"]} KiB peak')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='comma-separated order counts, one database each')
+    parser.add_argument('--operations', default=','.join(OPERATIONS),
+                        help='comma-separated subset of the operations')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per operation')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown or memory growth, as a fraction (default 0.25)')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    operations = args.operations.split(',')
+    unknown = set(operations) - set(OPERATIONS)
+    if unknown:
+        parser.error(f'unknown operations: {", ".join(sorted(unknown))}')
+
+    if args.worker:
+        json.dump(run_size(args.worker, args.repeat, operations), sys.stdout)
+        return
+
+    results = {}
+    for size in args.sizes.split(','):
+        # A fresh interpreter per size, so one database's caches and
+        # allocations cannot leak into the next one's numbers.
+        worker = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', size,
+             '--repeat', str(args.repeat), '--operations', ','.join(operations)],
+            stdout=subprocess.PIPE, text=True, check=True,
+        )
+        results[size] = json.loads(worker.stdout)
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print('Regressions against the baseline:')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+        print(f'No regressions against {args.baseline}.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Measure what resolver tracing costs per /graphql request.
+
+Runs one query through CRMGraphQLView against a throwaway SQLite database
+in four modes: a view with the tracing hooks removed, tracing disabled
+(the default), GRAPHQL_TRACING_ENABLED (logged only) and a request with
+the debug header (logged and returned in extensions.tracing):
+
+    python benchmarks/bench_tracing.py --requests 2000
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql_crm.settings')
+
+QUERY = '''
+{
+  totalOrders
+  orders(first: 20) {
+    edges { node { id totalAmount customer { name } products { name price } } }
+  }
+}
+'''
+
+
+def setup_database(path):
+    from django.conf import settings
+    settings.DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000, help='requests per mode')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_database(os.path.join(tmp, 'bench.sqlite3'))
+        import seed_db
+        seed_db.seed(customers=200, products=100, orders=2000, clear=False)
+
+        from django.conf import settings
+        from django.test import RequestFactory
+
+        import crm.schema
+        from crm.tracing import logger
+        from crm.views import CRMGraphQLView
+
+        class UntracedView(CRMGraphQLView):
+            def start_trace(self, request, operation_name):
+                return None
+
+        # Traces are built and handed to the logger, which drops them.
+        logger.setLevel(logging.INFO)
+        logger.addHandler(logging.NullHandler())
+        logger.propagate = False
+        settings.DEBUG = True
+
+        factory = RequestFactory()
+        body = json.dumps({'query': QUERY})
+        untraced = UntracedView.as_view(schema=crm.schema.schema)
+        view = CRMGraphQLView.as_view(schema=crm.schema.schema)
+        modes = [
+            ('hooks removed', untraced, False, {}),
+            ('disabled', view, False, {}),
+            ('enabled', view, True, {}),
+            ('debug header', view, False, {'HTTP_X_CRM_TRACE': '1'}),
+        ]
+
+        timings = {name: [] for name, *_ in modes}
+        # Modes take turns request by request, so drift affects them alike.
+        for _ in range(args.requests):
+            for name, view_func, enabled, headers in modes:
+                settings.CRM_SETTINGS = {**getattr(settings, 'CRM_SETTINGS', {}),
+                                         'GRAPHQL_TRACING_ENABLED': enabled}
+                request = factory.post('/graphql', body, content_type='application/json', **headers)
+                start = time.perf_counter()
+                response = view_func(request)
+                timings[name].append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise SystemExit(response.content)
+
+        base = statistics.median(timings['hooks removed'])
+        print(f'median of {args.requests} requests per mode')
+        print(f'{"mode":<14} {"per request":>12} {"overhead":>9}')
+        for name, *_ in modes:
+            per_request = statistics.median(timings[name])
+            print(f'{name:<14} {per_request * 1e6:>10.0f}us {(per_request / base - 1) * 100:>8.1f}%')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+
+class CrmConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'crm'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+
+        from crm import signals  # noqa: F401  (connects the receivers)
+        from crm.metrics import install_sql_counter
+        from crm.search import install_search_index
+        from crm.slow_log import install_statement_recorder
+
+        connection_created.connect(install_sql_counter)
+        connection_created.connect(install_statement_recorder)
+        post_migrate.connect(install_search_index, sender=self)
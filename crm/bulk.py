@@ -0,0 +1,214 @@
+import re
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from crm.models import Customer, Order, Product, rows_changed
+
+PHONE_RE = re.compile(r'^(\+\d{1,15}|\d{3}-\d{3}-\d{4})$')
+
+# Rows per INSERT and per IN (...) lookup; stays under SQLite's 999 bound parameters.
+CHUNK_SIZE = 500
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def validate_phone(phone):
+    if phone and not PHONE_RE.match(phone):
+        raise ValidationError("Invalid phone format. Use +1234567890 or 123-456-7890")
+
+
+def _clean_customer(row):
+    """Validate one input row without touching the database."""
+    if not row.name:
+        raise ValidationError({'name': ['This field cannot be blank.']})
+    if len(row.name) > Customer._meta.get_field('name').max_length:
+        raise ValidationError({'name': ['Ensure this value has at most 100 characters.']})
+    validate_email(row.email)
+    if len(row.email) > Customer._meta.get_field('email').max_length:
+        raise ValidationError({'email': ['Ensure this value has at most 254 characters.']})
+    validate_phone(row.phone)
+    return Customer(name=row.name, email=row.email, phone=row.phone or None)
+
+
+def _duplicate_email_error():
+    return ValidationError({'email': ['Customer with this Email already exists.']})
+
+
+def bulk_create_customers(rows):
+    """Create customers from ``rows`` with a handful of statements.
+
+    Rows are validated in memory, emails are checked against the table with
+    chunked ``IN`` queries and against earlier rows of the same batch, and
+    the valid rows are inserted with chunked ``bulk_create``. Returns
+    ``(customers, errors)`` where ``errors`` holds ``(index, row, message)``
+    for every rejected row, in input order.
+    """
+    errors = []
+    candidates = []
+    seen = set()
+    for index, row in enumerate(rows):
+        try:
+            customer = _clean_customer(row)
+            if customer.email in seen:
+                raise _duplicate_email_error()
+        except ValidationError as e:
+            errors.append((index, row, str(e)))
+            continue
+        seen.add(customer.email)
+        candidates.append((index, row, customer))
+
+    existing = set()
+    for chunk in _chunks([customer.email for _, _, customer in candidates]):
+        existing.update(Customer.objects.filter(email__in=chunk).values_list('email', flat=True))
+
+    valid = []
+    for index, row, customer in candidates:
+        if customer.email in existing:
+            errors.append((index, row, str(_duplicate_email_error())))
+        else:
+            valid.append((index, row, customer))
+
+    created = []
+    with transaction.atomic():
+        for chunk in _chunks(valid):
+            try:
+                with transaction.atomic():
+                    Customer.objects.bulk_create([customer for _, _, customer in chunk])
+                created.extend(customer for _, _, customer in chunk)
+            except IntegrityError:
+                # Another writer took one of the emails since the IN check;
+                # retry this chunk row by row to find out which.
+                for index, row, customer in chunk:
+                    try:
+                        with transaction.atomic():
+                            customer.save()
+                        created.append(customer)
+                    except IntegrityError:
+                        errors.append((index, row, str(_duplicate_email_error())))
+
+    errors.sort(key=lambda error: error[0])
+    return created, errors
+
+
+def _parse_ids(values):
+    ids = []
+    for value in values:
+        try:
+            ids.append(int(value))
+        except (TypeError, ValueError):
+            raise ValidationError(f"Invalid ID: {value}")
+    return ids
+
+
+def bulk_create_orders(rows):
+    """Create orders from ``rows`` (customer_id, product_ids) in a fixed number of queries.
+
+    Every customer and product referenced by the batch is fetched with one
+    ``IN`` query each, totals are summed from the fetched prices, orders are
+    inserted with ``bulk_create`` and their ``Order.products`` rows with one
+    more ``bulk_create`` on the through table. Returns ``(orders, errors)``
+    where ``errors`` holds ``(index, row, message)`` for every rejected row.
+    """
+    errors = []
+    parsed = []
+    for index, row in enumerate(rows):
+        try:
+            if not row.product_ids:
+                raise ValidationError("At least one product is required")
+            customer_id, = _parse_ids([row.customer_id])
+            # An order holds each product once, as order.products.set() would.
+            product_ids = list(dict.fromkeys(_parse_ids(row.product_ids)))
+        except ValidationError as e:
+            errors.append((index, row, e.messages[0]))
+            continue
+        parsed.append((index, row, customer_id, product_ids))
+
+    customer_ids = set()
+    for chunk in _chunks(list({customer_id for _, _, customer_id, _ in parsed})):
+        customer_ids.update(Customer.objects.filter(pk__in=chunk).values_list('pk', flat=True))
+    prices = {}
+    for chunk in _chunks(list({pk for _, _, _, product_ids in parsed for pk in product_ids})):
+        prices.update(Product.objects.filter(pk__in=chunk).values_list('pk', 'price'))
+
+    valid = []
+    for index, row, customer_id, product_ids in parsed:
+        missing = [str(pk) for pk in product_ids if pk not in prices]
+        if customer_id not in customer_ids:
+            errors.append((index, row, f"Customer with ID {row.customer_id} does not exist"))
+        elif missing:
+            errors.append((index, row, f"Invalid product IDs: {', '.join(missing)}"))
+        else:
+            total = sum((prices[pk] for pk in product_ids), Decimal('0'))
+            valid.append((Order(customer_id=customer_id, total_amount=total), product_ids))
+
+    orders = [order for order, _ in valid]
+    with transaction.atomic():
+        Order.objects.bulk_create(orders, batch_size=CHUNK_SIZE)
+        OrderProduct = Order.products.through
+        OrderProduct.objects.bulk_create(
+            [
+                OrderProduct(order_id=order.pk, product_id=product_id)
+                for order, product_ids in valid
+                for product_id in product_ids
+            ],
+            batch_size=CHUNK_SIZE,
+        )
+
+    errors.sort(key=lambda error: error[0])
+    return orders, errors
+
+
+def _supports_update_returning():
+    if connection.vendor == 'postgresql':
+        return True
+    # SQLite grew RETURNING in 3.35, the same release that allows it on INSERT.
+    return connection.vendor == 'sqlite' and connection.features.can_return_rows_from_bulk_insert
+
+
+def restock_low_stock(threshold=10, increment=10, product_ids=None):
+    """Add ``increment`` to the stock of every product below ``threshold``.
+
+    The restock is a single ``UPDATE ... SET stock = stock + %s WHERE stock <
+    %s``, so concurrent orders cannot interleave with it. The updated rows
+    come back through ``RETURNING`` where the database supports it; elsewhere
+    they are read, locked, by one SELECT in the same transaction. Returns
+    ``(name, old_stock, new_stock)`` for each updated product.
+    """
+    if product_ids is not None:
+        product_ids = _parse_ids(product_ids)
+    if not _supports_update_returning():
+        products = Product.objects.filter(stock__lt=threshold)
+        if product_ids is not None:
+            products = products.filter(pk__in=product_ids)
+        with transaction.atomic():
+            rows = list(products.select_for_update().order_by('pk').values_list('name', 'stock'))
+            products.update(stock=F('stock') + increment)
+        return [(name, stock, stock + increment) for name, stock in rows]
+
+    quote = connection.ops.quote_name
+    sql = (
+        f"UPDATE {quote(Product._meta.db_table)} SET {quote('stock')} = {quote('stock')} + %s "
+        f"WHERE {quote('stock')} < %s"
+    )
+    params = [increment, threshold]
+    if product_ids is not None:
+        if not product_ids:
+            return []
+        sql += f" AND {quote('id')} IN ({', '.join(['%s'] * len(product_ids))})"
+        params.extend(product_ids)
+    sql += f" RETURNING {quote('name')}, {quote('stock')}"
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        # Raw SQL bypasses TrackedQuerySet, so report the write ourselves.
+        rows_changed.send(sender=Product)
+    return [(name, stock - increment, stock) for name, stock in rows]
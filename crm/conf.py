@@ -0,0 +1,44 @@
+from django.conf import settings
+
+# Fallbacks for the keys of CRM_SETTINGS that code reads at runtime.
+DEFAULTS = {
+    'HEARTBEAT_LOG_FILE': '/tmp/crm_heartbeat_log.txt',
+    'CUSTOMER_CLEANUP_LOG_FILE': '/tmp/customer_cleanup_log.txt',
+    'ORDER_REMINDERS_LOG_FILE': '/tmp/order_reminders_log.txt',
+    'LOW_STOCK_UPDATES_LOG_FILE': '/tmp/low_stock_updates_log.txt',
+    'CRM_REPORT_LOG_FILE': '/tmp/crm_report_log.txt',
+    'JOB_LOG_BUFFER_SIZE': 100,
+    'JOB_LOG_MAX_BYTES': 10 * 1024 * 1024,
+    'JOB_LOG_MAX_AGE': 7 * 24 * 60 * 60,
+    'JOB_LOG_BACKUP_COUNT': 52,
+    'GRAPHQL_MAX_PAGE_SIZE': 100,
+    'GRAPHQL_DEFAULT_PAGE_SIZE': 100,
+    'GRAPHQL_DOCUMENT_CACHE_SIZE': 256,
+    'GRAPHQL_MAX_VALIDATION_ERRORS': 100,
+    'GRAPHQL_PERSISTED_QUERY_CACHE': 'default',
+    'GRAPHQL_PERSISTED_QUERY_TIMEOUT': None,
+    'GRAPHQL_RESPONSE_CACHE_ENABLED': False,
+    'GRAPHQL_RESPONSE_CACHE_ALIAS': 'default',
+    'GRAPHQL_RESPONSE_CACHE_TIMEOUT': 300,
+    'GRAPHQL_MAX_QUERY_COST': 5000,
+    'GRAPHQL_MAX_QUERY_DEPTH': 10,
+    'GRAPHQL_DEFAULT_LIST_SIZE': 10,
+    'GRAPHQL_FIELD_COSTS': {},
+    'GRAPHQL_MAX_BATCH_SIZE': 10,
+    'GRAPHQL_JOB_ENDPOINT': None,
+    'GRAPHQL_JOB_TIMEOUT': 30,
+    'GRAPHQL_TRACING_ENABLED': False,
+    'GRAPHQL_TRACING_HEADER': 'X-CRM-Trace',
+    'GRAPHQL_METRICS_MAX_OPERATIONS': 200,
+    'GRAPHQL_SLOW_OPERATION_MS': 500,
+    'GRAPHQL_SLOW_OPERATION_SQL_COUNT': 50,
+    'GRAPHQL_SLOW_LOG_STATEMENTS': 5,
+    'GRAPHQL_SLOW_LOG_EXPLAIN': False,
+    'GRAPHQL_SLOW_LOG_REDACT': ('email', 'phone', 'name', 'address', 'password', 'token', 'secret'),
+    'CUSTOMER_SEARCH_BACKEND': None,
+}
+
+
+def crm_setting(name):
+    """Read ``name`` from ``settings.CRM_SETTINGS``, falling back to DEFAULTS."""
+    return getattr(settings, 'CRM_SETTINGS', {}).get(name, DEFAULTS[name])
@@ -0,0 +1,185 @@
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLList,
+    GraphQLNonNull,
+    InlineFragmentNode,
+    VariableNode,
+    ValidationRule,
+    get_named_type,
+    is_composite_type,
+    validate,
+    value_from_ast_untyped,
+)
+
+from crm.conf import crm_setting
+
+PAGE_SIZE_ARGUMENTS = ('first', 'last')
+# Reports kept per operation of a cached document, across page sizes.
+MAX_MEMO_REPORTS = 32
+
+
+def _is_list(type_):
+    if isinstance(type_, GraphQLNonNull):
+        type_ = type_.of_type
+    return isinstance(type_, GraphQLList)
+
+
+def _is_connection(type_):
+    return 'edges' in getattr(type_, 'fields', {}) and 'pageInfo' in type_.fields
+
+
+class QueryCostRule(ValidationRule):
+    """Computes the cost and depth of the executed operation.
+
+    Every field costs its weight from GRAPHQL_FIELD_COSTS (``Type.field``),
+    or 1 for object fields and 0 for scalars. A connection or list field
+    multiplies the cost of its selection by its ``first``/``last`` argument,
+    by the default page size for connections, or by
+    GRAPHQL_DEFAULT_LIST_SIZE for plain lists. An operation over
+    GRAPHQL_MAX_QUERY_COST or GRAPHQL_MAX_QUERY_DEPTH is reported as a
+    validation error, so no resolver runs.
+
+    ``variables`` and ``operation_name`` are bound by ``analyze_cost``, which
+    also collects the result and the variables that set page sizes.
+    """
+
+    variables = None
+    operation_name = None
+    result = None
+
+    def enter_operation_definition(self, node, *args):
+        name = node.name.value if node.name else None
+        if self.operation_name is not None and name != self.operation_name:
+            return self.SKIP
+        schema = self.context.schema
+        root_type = schema.get_root_type(node.operation)
+        cost, depth = self.selection_cost(root_type, node.selection_set, 1)
+        self.result.update(cost=cost, depth=depth)
+
+        max_cost = crm_setting('GRAPHQL_MAX_QUERY_COST')
+        max_depth = crm_setting('GRAPHQL_MAX_QUERY_DEPTH')
+        if cost > max_cost:
+            self.report_error(GraphQLError(
+                f'Query cost {cost} exceeds the maximum of {max_cost}. '
+                'Request smaller pages or fewer nested fields.',
+                node, extensions={'code': 'QUERY_TOO_EXPENSIVE', 'cost': cost, 'maximumCost': max_cost},
+            ))
+        if depth > max_depth:
+            self.report_error(GraphQLError(
+                f'Query depth {depth} exceeds the maximum of {max_depth}.',
+                node, extensions={'code': 'QUERY_TOO_DEEP', 'depth': depth, 'maximumDepth': max_depth},
+            ))
+        return self.SKIP
+
+    def selection_cost(self, parent_type, selection_set, depth):
+        """Return ``(cost, depth)`` of ``selection_set`` on ``parent_type``."""
+        cost = 0
+        max_depth = depth
+        for field, field_type in self.fields(parent_type, selection_set):
+            named_type = get_named_type(field_type.type)
+            weights = crm_setting('GRAPHQL_FIELD_COSTS')
+            weight = weights.get(
+                f'{parent_type.name}.{field.name.value}', 1 if is_composite_type(named_type) else 0
+            )
+            if field.selection_set is None:
+                cost += weight
+                continue
+            child_cost, child_depth = self.selection_cost(named_type, field.selection_set, depth + 1)
+            cost += weight + self.multiplier(parent_type, field, field_type, named_type) * child_cost
+            max_depth = max(max_depth, child_depth)
+        return cost, max_depth
+
+    def multiplier(self, parent_type, field, field_type, named_type):
+        if _is_connection(parent_type) and field.name.value == 'edges':
+            # Already counted by the connection field's page size.
+            return 1
+        if not (_is_connection(named_type) or _is_list(field_type.type)):
+            return 1
+        for argument in field.arguments:
+            if argument.name.value in PAGE_SIZE_ARGUMENTS:
+                if isinstance(argument.value, VariableNode):
+                    self.result.setdefault('page_variables', set()).add(argument.value.name.value)
+                size = value_from_ast_untyped(argument.value, self.variables)
+                if isinstance(size, int):
+                    return max(size, 0)
+        if _is_connection(named_type):
+            return crm_setting('GRAPHQL_DEFAULT_PAGE_SIZE')
+        return crm_setting('GRAPHQL_DEFAULT_LIST_SIZE')
+
+    def fields(self, parent_type, selection_set):
+        """Yield ``(FieldNode, GraphQLField)`` pairs, expanding fragments."""
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                if selection.name.value.startswith('__'):
+                    continue
+                field_type = getattr(parent_type, 'fields', {}).get(selection.name.value)
+                if field_type is not None:
+                    yield selection, field_type
+            elif isinstance(selection, InlineFragmentNode):
+                type_condition = selection.type_condition
+                fragment_type = (
+                    self.context.schema.get_type(type_condition.name.value)
+                    if type_condition else parent_type
+                )
+                yield from self.fields(fragment_type, selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = self.context.get_fragment(selection.name.value)
+                if fragment is not None:
+                    fragment_type = self.context.schema.get_type(fragment.type_condition.name.value)
+                    yield from self.fields(fragment_type, fragment.selection_set)
+
+
+def _cost_settings():
+    return (
+        crm_setting('GRAPHQL_MAX_QUERY_COST'),
+        crm_setting('GRAPHQL_MAX_QUERY_DEPTH'),
+        crm_setting('GRAPHQL_DEFAULT_PAGE_SIZE'),
+        crm_setting('GRAPHQL_DEFAULT_LIST_SIZE'),
+        tuple(sorted(crm_setting('GRAPHQL_FIELD_COSTS').items())),
+    )
+
+
+def analyze_cost(schema, document, variables=None, operation_name=None, memo=None):
+    """Return ``(report, errors)`` for the operation that will be executed.
+
+    ``report`` holds the computed ``cost`` and ``depth`` alongside the
+    configured maxima and is meant for the response ``extensions``.
+
+    ``memo`` is the dict a DocumentCache entry keeps for ``document``. The
+    result is stored there per operation, page-size variables and cost
+    settings, so a repeated operation is not walked again.
+    """
+    variables = variables or {}
+    reports = key = None
+    if memo is not None and operation_name in memo:
+        page_variables, reports = memo[operation_name]
+        key = (_cost_settings(), tuple(repr(variables.get(name)) for name in page_variables))
+        if key in reports:
+            return reports[key]
+
+    result = {}
+    rule = type('BoundQueryCostRule', (QueryCostRule,), {
+        'variables': variables,
+        'operation_name': operation_name,
+        'result': result,
+    })
+    errors = validate(schema, document, [rule])
+    report = {
+        'requestedQueryCost': result.get('cost', 0),
+        'maximumQueryCost': crm_setting('GRAPHQL_MAX_QUERY_COST'),
+        'depth': result.get('depth', 0),
+        'maximumDepth': crm_setting('GRAPHQL_MAX_QUERY_DEPTH'),
+    }
+
+    if memo is not None:
+        if reports is None:
+            page_variables = tuple(sorted(result.get('page_variables', ())))
+            reports = {}
+            memo[operation_name] = (page_variables, reports)
+            key = (_cost_settings(), tuple(repr(variables.get(name)) for name in page_variables))
+        if len(reports) >= MAX_MEMO_REPORTS:
+            reports.clear()
+        reports[key] = (report, errors)
+    return report, errors
@@ -3,67 +3,48 @@
 import os
 import sys
 import django
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 # Setup Django environment
 sys.path.append('/path/to/your/django/project')
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crm.settings')
 django.setup()
 
-from gql import gql, Client
-from gql.transport.requests import RequestsHTTPTransport
+from django.utils import timezone
+
+from crm.documents import ORDER_REMINDERS_QUERY
+from crm.executor import execute_operation
+from crm.joblog import JobLog
 
 def send_order_reminders():
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    # GraphQL query to get recent orders
-    query = gql("""
-    query {
-        orders(last: 100) {
-            edges {
-                node {
-                    id
-                    orderDate
-                    customer {
-                        email
-                    }
-                }
-            }
-        }
-    }
-    """)
-    
-    # Configure GraphQL client
-    transport = RequestsHTTPTransport(
-        url='http://localhost:8000/graphql',
-        use_json=True
-    )
-    
-    try:
-        client = Client(transport=transport, fetch_schema_from_transport=True)
-        result = client.execute(query)
-        
-        # Process orders from last 7 days
-        one_week_ago = datetime.now() - timedelta(days=7)
-        
-        with open('/tmp/order_reminders_log.txt', 'a') as log_file:
-            log_file.write(f"[{timestamp}] Order Reminders:\n")
+    # Reminder records are buffered and appended a batch at a time
+    with JobLog('order_reminders') as log:
+        try:
+            # Orders from the last 7 days, filtered by the database a page at a time
+            one_week_ago = timezone.now() - timedelta(days=7)
             
-            for edge in result.get('orders', {}).get('edges', []):
-                order = edge['node']
-                order_date = datetime.fromisoformat(order['orderDate'].replace('Z', ''))
+            reminders = 0
+            after = None
+            while True:
+                result = execute_operation(
+                    ORDER_REMINDERS_QUERY,
+                    {'since': one_week_ago.isoformat(), 'after': after},
+                )
+                for edge in result['orders']['edges']:
+                    order = edge['node']
+                    log.write('reminder', order_id=order['id'], customer_email=order['customer']['email'])
+                    reminders += 1
                 
-                if order_date >= one_week_ago:
-                    log_entry = f"Order ID: {order['id']}, Customer Email: {order['customer']['email']}\n"
-                    log_file.write(log_entry)
+                page_info = result['orders']['pageInfo']
+                if not page_info['hasNextPage']:
+                    break
+                after = page_info['endCursor']
+            
+            log.write('done', reminders=reminders)
+            print("Order reminders processed!")
             
-            log_file.write("\n")
-        
-        print("Order reminders processed!")
-        
-    except Exception as e:
-        with open('/tmp/order_reminders_log.txt', 'a') as log_file:
-            log_file.write(f"[{timestamp}] ERROR: {str(e)}\n")
+        except Exception as e:
+            log.write('error', error=str(e))
 
 if __name__ == "__main__":
     send_order_reminders()
@@ -0,0 +1,144 @@
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from weakref import WeakKeyDictionary
+
+from django.core.cache import caches
+from graphql import GraphQLError, parse, print_schema, validate
+
+from crm.conf import crm_setting
+from crm.metrics import record_cache_lookup
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses size maxsize')
+# ``costs`` is the memo analyze_cost() keeps for the document.
+CachedDocument = namedtuple('CachedDocument', 'document errors costs')
+
+_schema_versions = WeakKeyDictionary()
+
+
+def schema_version(schema):
+    """Hash of the schema's SDL, so cached documents never outlive a schema change."""
+    version = _schema_versions.get(schema)
+    if version is None:
+        version = hashlib.sha256(print_schema(schema).encode()).hexdigest()[:16]
+        _schema_versions[schema] = version
+    return version
+
+
+def document_hash(query):
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class DocumentCache:
+    """Bounded LRU of parsed documents, their validation errors and costs.
+
+    Entries are keyed by the SHA-256 of the query text, the schema version
+    and the validation rules in force. Documents that fail to parse are not
+    cached.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, schema, query, validation_rules=None):
+        """Return a CachedDocument; raises GraphQLError if ``query`` does not parse."""
+        rules = tuple(validation_rules or ())
+        key = (schema_version(schema), rules, document_hash(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                record_cache_lookup('document', True)
+                return entry
+            self.misses += 1
+        record_cache_lookup('document', False)
+
+        document = parse(query)
+        errors = validate(
+            schema, document, rules or None, max_errors=crm_setting('GRAPHQL_MAX_VALIDATION_ERRORS')
+        )
+        entry = CachedDocument(document, errors, {})
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, len(self._entries), self.maxsize)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+document_cache = DocumentCache(crm_setting('GRAPHQL_DOCUMENT_CACHE_SIZE'))
+
+
+class PersistedQueries:
+    """Automatic persisted queries: clients may send only the document's SHA-256.
+
+    A client first sends ``extensions.persistedQuery.sha256Hash`` alone; on
+    PERSISTED_QUERY_NOT_FOUND it retries with the query text as well, which
+    registers it in the Django cache for every later request.
+    """
+
+    key_prefix = 'graphql:apq:'
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, query, extensions):
+        """Return the query text for a request, registering or looking up its hash."""
+        persisted = (extensions or {}).get('persistedQuery')
+        if not persisted:
+            return query
+        digest = persisted.get('sha256Hash')
+        if not digest:
+            raise GraphQLError('persistedQuery needs a sha256Hash.')
+
+        cache = caches[crm_setting('GRAPHQL_PERSISTED_QUERY_CACHE')]
+        if query:
+            if document_hash(query) != digest:
+                raise GraphQLError('Provided sha256Hash does not match query.')
+            cache.set(self.key_prefix + digest, query, crm_setting('GRAPHQL_PERSISTED_QUERY_TIMEOUT'))
+            return query
+
+        query = cache.get(self.key_prefix + digest)
+        if query is None:
+            self.misses += 1
+            record_cache_lookup('persisted', False)
+            raise GraphQLError(
+                'PersistedQueryNotFound', extensions={'code': 'PERSISTED_QUERY_NOT_FOUND'}
+            )
+        self.hits += 1
+        record_cache_lookup('persisted', True)
+        return query
+
+
+persisted_queries = PersistedQueries()
+
+
+def cache_metrics():
+    """Hit/miss counters and hit ratios of the document and persisted-query caches."""
+    info = document_cache.info()
+    lookups = info.hits + info.misses
+    persisted_lookups = persisted_queries.hits + persisted_queries.misses
+    return {
+        'document_cache_hits': info.hits,
+        'document_cache_misses': info.misses,
+        'document_cache_size': info.size,
+        'document_cache_hit_ratio': info.hits / lookups if lookups else 0.0,
+        'persisted_query_hits': persisted_queries.hits,
+        'persisted_query_misses': persisted_queries.misses,
+        'persisted_query_hit_ratio': (
+            persisted_queries.hits / persisted_lookups if persisted_lookups else 0.0
+        ),
+    }
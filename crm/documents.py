@@ -0,0 +1,57 @@
+# GraphQL operations sent by the cron and Celery jobs.
+# `manage.py check_graphql_documents` validates every entry of DOCUMENTS
+# against the schema snapshot in crm/schema.graphql.
+
+HEARTBEAT_QUERY = """
+query Heartbeat {
+    hello
+}
+"""
+
+UPDATE_LOW_STOCK_MUTATION = """
+mutation UpdateLowStock {
+    updateLowStockProducts {
+        success
+        message
+        updatedProducts
+    }
+}
+"""
+
+CRM_REPORT_QUERY = """
+query CrmReport {
+    totalCustomers
+    crmReport {
+        customerCount
+        orderCount
+        revenue
+    }
+}
+"""
+
+ORDER_REMINDERS_QUERY = """
+query OrderReminders($since: DateTime!, $after: String) {
+    orders(orderDateGte: $since, orderBy: ORDER_DATE_ASC, first: 100, after: $after) {
+        pageInfo {
+            hasNextPage
+            endCursor
+        }
+        edges {
+            node {
+                id
+                orderDate
+                customer {
+                    email
+                }
+            }
+        }
+    }
+}
+"""
+
+DOCUMENTS = {
+    'HEARTBEAT_QUERY': HEARTBEAT_QUERY,
+    'UPDATE_LOW_STOCK_MUTATION': UPDATE_LOW_STOCK_MUTATION,
+    'CRM_REPORT_QUERY': CRM_REPORT_QUERY,
+    'ORDER_REMINDERS_QUERY': ORDER_REMINDERS_QUERY,
+}
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+from graphene_django.settings import graphene_settings
+from graphql import GraphQLError, execute
+
+from crm.conf import crm_setting
+from crm.document_cache import document_cache
+from crm.snapshot import validate_against_snapshot
+
+
+class GraphQLExecutionError(Exception):
+    """The operation ran but returned errors; ``errors`` holds their messages."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors))
+
+
+def execute_operation(query, variables=None, operation_name=None, schema=None):
+    """Run a GraphQL operation for a background job and return its ``data``.
+
+    By default the document runs in this process against ``schema`` (the
+    GRAPHENE ``SCHEMA`` setting), so jobs need neither the web server nor
+    an introspection round trip. Setting GRAPHQL_JOB_ENDPOINT sends it to
+    that URL instead, after validating it against the schema snapshot.
+    Either way the result is the ``data`` dict, as from gql's
+    ``Client.execute``, and errors raise GraphQLExecutionError.
+    """
+    endpoint = crm_setting('GRAPHQL_JOB_ENDPOINT')
+    if endpoint:
+        return _execute_http(endpoint, query, variables, operation_name)
+    return _execute_local(schema or graphene_settings.SCHEMA, query, variables, operation_name)
+
+
+def _execute_local(schema, query, variables, operation_name):
+    try:
+        document, errors, _ = document_cache.get(schema.graphql_schema, query)
+    except GraphQLError as e:
+        errors = [e]
+    if not errors:
+        # A context object gives the resolvers somewhere to keep their loaders.
+        result = execute(
+            schema.graphql_schema,
+            document,
+            context_value=SimpleNamespace(),
+            variable_values=variables,
+            operation_name=operation_name,
+        )
+        errors = result.errors
+    if errors:
+        raise GraphQLExecutionError([error.message for error in errors])
+    return result.data
+
+
+def _execute_http(endpoint, query, variables, operation_name):
+    # Only needed when jobs are pointed at a web server.
+    import requests
+
+    # Checked against the SDL snapshot rather than by introspecting the server.
+    errors = validate_against_snapshot(query)
+    if errors:
+        raise GraphQLExecutionError([error.message for error in errors])
+    response = requests.post(
+        endpoint,
+        json={'query': query, 'variables': variables, 'operationName': operation_name},
+        timeout=crm_setting('GRAPHQL_JOB_TIMEOUT'),
+    )
+    is_json = response.headers.get('Content-Type', '').startswith('application/json')
+    payload = response.json() if is_json else {}
+    if payload.get('errors'):
+        raise GraphQLExecutionError([error.get('message', '') for error in payload['errors']])
+    response.raise_for_status()
+    return payload['data']
@@ -0,0 +1,171 @@
+import fcntl
+import glob
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from crm.conf import crm_setting
+
+# Job name -> the CRM_SETTINGS key holding its log path.
+JOB_LOG_FILES = {
+    'heartbeat': 'HEARTBEAT_LOG_FILE',
+    'customer_cleanup': 'CUSTOMER_CLEANUP_LOG_FILE',
+    'order_reminders': 'ORDER_REMINDERS_LOG_FILE',
+    'low_stock_updates': 'LOW_STOCK_UPDATES_LOG_FILE',
+    'crm_report': 'CRM_REPORT_LOG_FILE',
+}
+
+# Rotated files are named <path>.<UTC rotation time>[-<n>].
+ROTATED_SUFFIX_RE = re.compile(r'\.(\d{8}T\d{6})(?:-\d+)?$')
+ROTATED_FORMAT = '%Y%m%dT%H%M%S'
+
+
+def _timestamp(moment=None):
+    # Fixed width, so timestamps compare correctly as strings.
+    return (moment or datetime.now(timezone.utc)).astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+
+def log_path(job):
+    return crm_setting(JOB_LOG_FILES[job])
+
+
+class JobLog:
+    """Buffered JSON-lines log of one job, rotated by size and by age.
+
+    Each ``write()`` adds one record, ``{"ts": ..., "job": ..., "event":
+    ..., **fields}``, to an in-memory buffer. The buffer reaches the file in
+    a single append when it holds JOB_LOG_BUFFER_SIZE records and when the
+    log is flushed or closed, which the ``with`` statement does. Before an
+    append that would take the file past JOB_LOG_MAX_BYTES, or once its
+    first record is older than JOB_LOG_MAX_AGE seconds, the file is renamed
+    to ``<path>.<rotation time>`` and only the newest JOB_LOG_BACKUP_COUNT
+    of those are kept. Appends and rotations hold an exclusive ``flock``,
+    so cron and Celery processes can share a log.
+    """
+
+    def __init__(self, job, path=None):
+        self.job = job
+        self.path = path or log_path(job)
+        self.buffer_size = crm_setting('JOB_LOG_BUFFER_SIZE')
+        self.max_bytes = crm_setting('JOB_LOG_MAX_BYTES')
+        self.max_age = crm_setting('JOB_LOG_MAX_AGE')
+        self.backup_count = crm_setting('JOB_LOG_BACKUP_COUNT')
+        self._buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def write(self, event, **fields):
+        record = {'ts': _timestamp(), 'job': self.job, 'event': event, **fields}
+        self._buffer.append(json.dumps(record, cls=DjangoJSONEncoder) + '\n')
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        data = ''.join(self._buffer).encode()
+        self._buffer.clear()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        f = self._open_locked()
+        try:
+            if self._needs_rotation(f, len(data)):
+                self._rotate()
+                f.close()
+                f = self._open_locked()
+            f.write(data)
+        finally:
+            # Closing releases the lock.
+            f.close()
+
+    def _open_locked(self):
+        while True:
+            f = open(self.path, 'ab')
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.stat(self.path).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            # Another process rotated the file while we waited for the lock.
+            f.close()
+
+    def _needs_rotation(self, f, pending):
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return False
+        if self.max_bytes and size + pending > self.max_bytes:
+            return True
+        if self.max_age:
+            with open(self.path, 'rb') as reader:
+                first = reader.readline()
+            try:
+                started = datetime.fromisoformat(json.loads(first)['ts'])
+            except (ValueError, KeyError, TypeError):
+                # Free-text lines from before the JSON format: move them aside.
+                return True
+            return (datetime.now(timezone.utc) - started).total_seconds() > self.max_age
+        return False
+
+    def _rotate(self):
+        stamp = time.strftime(ROTATED_FORMAT, time.gmtime())
+        target = f'{self.path}.{stamp}'
+        n = 0
+        while os.path.exists(target):
+            n += 1
+            target = f'{self.path}.{stamp}-{n}'
+        os.rename(self.path, target)
+        for old in rotated_files(self.path)[:-self.backup_count or None]:
+            os.remove(old)
+
+
+def rotated_files(path):
+    """The rotated files of ``path``, oldest first."""
+    files = [name for name in glob.glob(glob.escape(path) + '.*') if ROTATED_SUFFIX_RE.search(name)]
+    return sorted(files, key=lambda name: (ROTATED_SUFFIX_RE.search(name).group(1), len(name), name))
+
+
+def read_job_log(path, since=None, until=None, event=None):
+    """Stream the records of ``path`` and its rotated files, oldest first.
+
+    Only records with ``since <= ts < until`` (aware datetimes) and, if
+    given, the ``event`` are yielded. Rotated files that ended before
+    ``since`` are skipped without being opened, and lines that are not
+    JSON records are ignored.
+    """
+    since = _timestamp(since) if since else None
+    until = _timestamp(until) if until else None
+    files = rotated_files(path) + ([path] if os.path.exists(path) else [])
+    for name in files:
+        match = ROTATED_SUFFIX_RE.search(name) if name != path else None
+        if since and match:
+            rotated_at = datetime.strptime(match.group(1), ROTATED_FORMAT).replace(tzinfo=timezone.utc)
+            if _timestamp(rotated_at) < since:
+                continue
+        with open(name, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(record, dict) or 'ts' not in record:
+                    continue
+                if since and record['ts'] < since:
+                    continue
+                # Buffered writers can interleave slightly out of order, so a
+                # later record doesn't end the scan.
+                if until and record['ts'] >= until:
+                    continue
+                if event and record.get('event') != event:
+                    continue
+                yield record
@@ -0,0 +1,153 @@
+import asyncio
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+
+from crm.models import Customer, Order
+
+
+class DataLoader:
+    """Caches values by key and fetches every pending key in one batch.
+
+    The synchronous executor resolves list items one at a time, so a list
+    resolver queues the keys of all its rows with ``prime_keys`` up front and
+    the first ``load`` that misses the cache fetches the whole queue at once.
+
+    An ``asynchronous`` loader returns an awaitable on a miss instead. The
+    fetch runs in the ORM thread, and every load that arrives while it is
+    running waits for it rather than starting a fetch of its own.
+    """
+
+    def __init__(self, batch_load_fn, asynchronous=False):
+        self.batch_load_fn = batch_load_fn
+        self.asynchronous = asynchronous
+        self._cache = {}
+        self._pending = {}
+        self._batch = None
+
+    def prime(self, key, value):
+        self._cache[key] = value
+        self._pending.pop(key, None)
+
+    def prime_keys(self, keys):
+        for key in keys:
+            if key not in self._cache:
+                self._pending[key] = None
+
+    def load(self, key):
+        if key in self._cache:
+            return self._cache[key]
+        if self.asynchronous:
+            return self._load_async(key)
+        self._pending[key] = None
+        self._dispatch()
+        return self._cache[key]
+
+    def load_many(self, keys):
+        keys = list(keys)
+        self.prime_keys(keys)
+        if self._pending:
+            self._dispatch()
+        return [self._cache[key] for key in keys]
+
+    def clear(self):
+        self._cache.clear()
+        self._pending.clear()
+
+    def _dispatch(self):
+        keys = list(self._pending)
+        self._pending.clear()
+        self._cache.update(zip(keys, self.batch_load_fn(keys)))
+
+    async def _load_async(self, key):
+        while key not in self._cache:
+            if self._batch is None:
+                self._pending[key] = None
+                keys = list(self._pending)
+                self._pending.clear()
+                self._batch = asyncio.ensure_future(self._fetch_async(keys))
+            await self._batch
+        return self._cache[key]
+
+    async def _fetch_async(self, keys):
+        try:
+            self._cache.update(zip(keys, await sync_to_async(self.batch_load_fn)(keys)))
+        finally:
+            self._batch = None
+
+
+class Loaders:
+    """The loaders of one GraphQL request.
+
+    Every batch function queues the keys of the rows it returns on the
+    loaders one level down, so each level of a nested selection costs one
+    query no matter how many rows it has.
+    """
+
+    def __init__(self, asynchronous=False):
+        self.asynchronous = asynchronous
+        self.customer = DataLoader(self._load_customers, asynchronous)
+        self.products_by_order = DataLoader(self._load_products_by_order, asynchronous)
+        self.orders_by_customer = DataLoader(self._load_orders_by_customer, asynchronous)
+        self.orders_by_product = DataLoader(self._load_orders_by_product, asynchronous)
+
+    def prime_customers(self, customers):
+        for customer in customers:
+            self.customer.prime(customer.pk, customer)
+            self.orders_by_customer.prime_keys([customer.pk])
+
+    def prime_products(self, products):
+        self.orders_by_product.prime_keys(product.pk for product in products)
+
+    def prime_orders(self, orders):
+        for order in orders:
+            self.customer.prime_keys([order.customer_id])
+            self.products_by_order.prime_keys([order.pk])
+
+    def clear(self):
+        for loader in (self.customer, self.products_by_order,
+                       self.orders_by_customer, self.orders_by_product):
+            loader.clear()
+
+    def _load_customers(self, ids):
+        customers = Customer.objects.in_bulk(ids)
+        self.orders_by_customer.prime_keys(customers)
+        return [customers.get(pk) for pk in ids]
+
+    def _load_products_by_order(self, order_ids):
+        rows = Order.products.through.objects.filter(
+            order_id__in=order_ids
+        ).select_related('product').order_by('pk')
+        products = defaultdict(list)
+        for row in rows:
+            products[row.order_id].append(row.product)
+        self.prime_products(p for group in products.values() for p in group)
+        return [products[pk] for pk in order_ids]
+
+    def _load_orders_by_customer(self, customer_ids):
+        orders = defaultdict(list)
+        for order in Order.objects.filter(customer_id__in=customer_ids).order_by('pk'):
+            orders[order.customer_id].append(order)
+        self.prime_orders(o for group in orders.values() for o in group)
+        return [orders[pk] for pk in customer_ids]
+
+    def _load_orders_by_product(self, product_ids):
+        rows = Order.products.through.objects.filter(
+            product_id__in=product_ids
+        ).select_related('order').order_by('pk')
+        orders = defaultdict(list)
+        for row in rows:
+            orders[row.product_id].append(row.order)
+        self.prime_orders(o for group in orders.values() for o in group)
+        return [orders[pk] for pk in product_ids]
+
+
+def get_loaders(info):
+    """Return the loaders attached to this request, creating them on first use."""
+    context = info.context
+    loaders = getattr(context, 'loaders', None)
+    if loaders is None:
+        loaders = Loaders()
+        if context is not None:
+            context.loaders = loaders
+    return loaders
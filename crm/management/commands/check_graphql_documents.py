@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from crm.documents import DOCUMENTS
+from crm.snapshot import SNAPSHOT_PATH, validate_against_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Validate the GraphQL documents in crm/documents.py against the schema snapshot.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--snapshot', default=str(SNAPSHOT_PATH), help='SDL file to validate against.')
+
+    def handle(self, *args, **options):
+        failed = 0
+        for name, document in DOCUMENTS.items():
+            errors = validate_against_snapshot(document, options['snapshot'])
+            for error in errors:
+                self.stdout.write(f'{name}: {error.message}')
+            failed += bool(errors)
+
+        if failed:
+            raise CommandError(f'{failed} of {len(DOCUMENTS)} documents do not match the schema.')
+        self.stdout.write(self.style.SUCCESS(f'All {len(DOCUMENTS)} documents match the schema.'))
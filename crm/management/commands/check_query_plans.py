@@ -0,0 +1,104 @@
+import random
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from crm.models import Customer, Order, OrderProduct, Product
+from crm.reports import period_totals
+
+
+def hot_queries(now):
+    """``(name, queryset, tables allowed to be scanned in full)`` for each hot query."""
+    week_ago = now - timedelta(days=7)
+    return [
+        ('low-stock sweep', Product.objects.filter(stock__lt=10), ()),
+        ('recent orders', Order.objects.filter(order_date__gte=week_ago).order_by('-order_date', '-pk')[:100], ()),
+        ("a customer's orders", Order.objects.filter(customer_id=1).order_by('-order_date')[:20], ()),
+        ('orders of products', OrderProduct.objects.filter(product_id__in=[1, 2, 3]), ()),
+        # Every customer has to be visited; their orders must not be.
+        ('inactive-customer detection', Customer.inactive(now - timedelta(days=365)), ('crm_customer',)),
+        ('revenue aggregate', period_totals(week_ago, now), ()),
+    ]
+
+
+def full_scans(plan):
+    """The tables ``plan`` reads in full, for SQLite and PostgreSQL plans."""
+    if connection.vendor == 'postgresql':
+        return set(re.findall(r'Seq Scan on (\w+)', plan))
+    scans = set()
+    for line in plan.splitlines():
+        match = re.search(r'\bSCAN (\w+)(.*)', line)
+        if match and 'INDEX' not in match.group(2):
+            scans.add(match.group(1))
+    return scans
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot CRM queries and fail if any of them scans a whole table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-seed', action='store_true',
+            help='Explain against the existing rows instead of seeding sample data.',
+        )
+        parser.add_argument('--customers', type=int, default=2000)
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--orders', type=int, default=20000)
+        parser.add_argument('--show-plans', action='store_true', help='Print every plan.')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Plans cannot be checked on {connection.vendor}.')
+
+        failures = []
+        # Seeded rows and planner statistics are rolled back afterwards.
+        with transaction.atomic():
+            if not options['no_seed']:
+                self.seed(options['customers'], options['products'], options['orders'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            for name, queryset, allowed in hot_queries(timezone.now()):
+                plan = queryset.explain()
+                scans = full_scans(plan) - set(allowed)
+                if options['show_plans']:
+                    self.stdout.write(f'{name}:\n{plan}\n')
+                if scans:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f'{name}: full scan of {", ".join(sorted(scans))}'))
+                else:
+                    self.stdout.write(f'{name}: ok')
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries fall back to a full table scan.')
+        self.stdout.write(self.style.SUCCESS('Every hot query uses an index.'))
+
+    def seed(self, customers, products, orders):
+        rng = random.Random(0)
+        now = timezone.now()
+        customers = Customer.objects.bulk_create(
+            Customer(name=f'Plan customer {i}', email=f'plan-customer-{i}@example.com')
+            for i in range(customers)
+        )
+        products = Product.objects.bulk_create(
+            Product(name=f'Plan product {i}', price=Decimal('9.99'), stock=rng.randrange(1000))
+            for i in range(products)
+        )
+        orders = Order.objects.bulk_create(
+            Order(customer=rng.choice(customers), total_amount=Decimal('9.99'))
+            for _ in range(orders)
+        )
+        # order_date is auto_now_add, so spread the orders over two years afterwards.
+        for order in orders:
+            order.order_date = now - timedelta(minutes=rng.randrange(2 * 365 * 24 * 60))
+        Order.objects.bulk_update(orders, ['order_date'], batch_size=500)
+        OrderProduct.objects.bulk_create(
+            (OrderProduct(order=order, product=product)
+             for order in orders for product in rng.sample(products, 2)),
+            batch_size=500,
+        )
@@ -0,0 +1,78 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from crm.joblog import JobLog
+from crm.models import Customer, Order
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete customers without an order in the last --days days, in small transactions, '
+        'and record the run in the customer_cleanup job log.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365, help='Inactivity period (default 365).')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Customers deleted per transaction (default 1000).',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true', help='Only count the inactive customers.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        inactive = Customer.inactive(cutoff)
+
+        if options['dry_run']:
+            count = inactive.count()
+            self.stdout.write(f'Would delete {count} inactive customers')
+            return
+
+        start = time.monotonic()
+        customers = orders = 0
+        last_pk = 0
+        while True:
+            # Walk the primary key so each batch starts where the last one ended.
+            batch = list(
+                inactive.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)
+                [:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+
+            batch_start = time.monotonic()
+            with transaction.atomic():
+                # Checked again under lock: an order may have arrived since the batch was read.
+                locked = list(inactive.filter(pk__in=batch).select_for_update().values_list('pk', flat=True))
+                _, deleted = Customer.objects.filter(pk__in=locked).delete()
+            customers += deleted.get(Customer._meta.label, 0)
+            orders += deleted.get(Order._meta.label, 0)
+            logger.info(
+                'Deleted %d inactive customers (%d orders) in %.2fs',
+                deleted.get(Customer._meta.label, 0), deleted.get(Order._meta.label, 0),
+                time.monotonic() - batch_start,
+            )
+
+        elapsed = time.monotonic() - start
+        logger.info(
+            'Deleted %d inactive customers and %d orders in %.1fs (%.0f customers/s)',
+            customers, orders, elapsed, customers / elapsed if elapsed else 0,
+        )
+        with JobLog('customer_cleanup') as log:
+            log.write(
+                'cleanup', days=options['days'], customers=customers, orders=orders,
+                seconds=round(elapsed, 3),
+            )
+        self.stdout.write(f'Deleted {customers} inactive customers')
@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+from graphene_django.settings import graphene_settings
+
+from crm.snapshot import SNAPSHOT_PATH, schema_sdl
+
+
+class Command(BaseCommand):
+    help = 'Write the SDL of the GraphQL schema to the checked-in snapshot.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schema',
+            help='Dotted path to the graphene schema; defaults to the GRAPHENE SCHEMA setting.',
+        )
+        parser.add_argument('--out', default=str(SNAPSHOT_PATH), help='File to write.')
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only compare the file with the schema; exit non-zero if it is stale.',
+        )
+
+    def handle(self, *args, **options):
+        schema = import_string(options['schema']) if options['schema'] else graphene_settings.SCHEMA
+        sdl = schema_sdl(schema)
+        out = Path(options['out'])
+
+        if options['check']:
+            if not out.exists() or out.read_text() != sdl:
+                raise CommandError(
+                    f'{out} is out of date; run `manage.py export_schema_snapshot`.'
+                )
+            self.stdout.write(self.style.SUCCESS(f'{out} matches the schema.'))
+            return
+
+        out.write_text(sdl)
+        self.stdout.write(self.style.SUCCESS(f'Wrote the schema SDL to {out}.'))
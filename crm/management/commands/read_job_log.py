@@ -0,0 +1,48 @@
+import json
+from datetime import datetime, time, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date, parse_datetime
+
+from crm.joblog import JOB_LOG_FILES, log_path, read_job_log
+
+
+def parse_moment(value):
+    """An aware datetime from an ISO date or datetime; naive values are UTC."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'Not a date or datetime: {value}')
+        moment = datetime.combine(day, time.min)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+class Command(BaseCommand):
+    help = 'Stream the records of a job log, rotated files included, oldest first.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('job', choices=sorted(JOB_LOG_FILES))
+        parser.add_argument('--since', type=parse_moment, help='Earliest record, e.g. 2026-01-01.')
+        parser.add_argument('--until', type=parse_moment, help='Records before this moment only.')
+        parser.add_argument('--event', help='Only records of this event, e.g. error.')
+        parser.add_argument('--limit', type=int, help='Stop after this many records.')
+        parser.add_argument('--json', action='store_true', help='Print the raw JSON lines.')
+
+    def handle(self, *args, **options):
+        records = read_job_log(
+            log_path(options['job']), since=options['since'], until=options['until'],
+            event=options['event'],
+        )
+        for count, record in enumerate(records, 1):
+            if options['json']:
+                self.stdout.write(json.dumps(record))
+            else:
+                fields = ' '.join(
+                    f'{key}={value}' for key, value in record.items() if key not in ('ts', 'job', 'event')
+                )
+                self.stdout.write(f"{record['ts']} {record.get('event')} {fields}")
+            if options['limit'] and count >= options['limit']:
+                break
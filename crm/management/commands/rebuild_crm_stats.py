@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from crm.models import CrmStats
+
+FIELDS = ('customer_count', 'order_count', 'total_revenue')
+
+
+class Command(BaseCommand):
+    help = 'Recompute the CrmStats counters from the Customer and Order tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only compare the counters with the tables; exit non-zero on drift.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            stored = CrmStats.objects.select_for_update().filter(pk=1).first()
+            actual = CrmStats.measure()
+            drift = [
+                f'{field}: stored {getattr(stored, field, None)}, actual {actual[field]}'
+                for field in FIELDS
+                if stored is None or getattr(stored, field) != actual[field]
+            ]
+            if not options['check']:
+                CrmStats.rebuild()
+
+        for line in drift:
+            self.stdout.write(line)
+        if options['check']:
+            if drift:
+                raise CommandError('CrmStats counters have drifted from the tables.')
+            self.stdout.write(self.style.SUCCESS('CrmStats counters match the tables.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                'Rebuilt CrmStats: {customer_count} customers, {order_count} orders, '
+                '{total_revenue} revenue.'.format(**actual)
+            ))
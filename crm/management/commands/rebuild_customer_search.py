@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from crm.models import Customer
+from crm.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Drop the customer search index and build it again from the customer table.'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        start = time.monotonic()
+        with transaction.atomic():
+            backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt the {type(backend).__name__} index of {Customer.objects.count()} customers '
+            f'in {time.monotonic() - start:.1f}s.'
+        ))
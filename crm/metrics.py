@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from crm.conf import crm_setting
+
+# prometheus_client keeps values in per-process files under this directory
+# when it is set, so /metrics can add up every gunicorn worker.
+MULTIPROCESS_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+OPERATION_LABELS = ('operation_name', 'operation_type')
+
+REQUEST_DURATION = Histogram(
+    'crm_graphql_request_duration_seconds',
+    'Time to parse, validate and execute one GraphQL operation.',
+    OPERATION_LABELS,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+ERRORS = Counter(
+    'crm_graphql_errors_total',
+    'GraphQL operations that returned errors.',
+    OPERATION_LABELS,
+)
+SQL_QUERIES = Histogram(
+    'crm_graphql_sql_queries',
+    'SQL statements run by one GraphQL operation.',
+    OPERATION_LABELS,
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+CACHE_LOOKUPS = Counter(
+    'crm_graphql_cache_lookups_total',
+    'Lookups in the document, persisted-query and response caches; hit ratio = hit / all.',
+    ('cache', 'result'),
+)
+ROWS_RETURNED = Counter(
+    'crm_graphql_rows_returned_total',
+    'Rows returned by connection fields.',
+    ('connection',),
+)
+
+# Label children are looked up once: .labels() costs more than .inc().
+_operation_children = {}
+_cache_children = {}
+_rows_children = {}
+_lock = threading.Lock()
+
+# The SQL statement count of the operation running in this context.
+_sql_count = ContextVar('crm_metrics_sql_count', default=None)
+
+
+def _count_sql(execute, sql, params, many, context):
+    count = _sql_count.get()
+    if count is not None:
+        count[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_sql_counter(sender, connection, **kwargs):
+    """connection_created receiver: count the statements of every connection.
+
+    Inserted first rather than appended, because ``execute_wrapper()`` pops
+    the last wrapper on exit and a connection may open inside one.
+    """
+    if _count_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_sql)
+
+
+def _children_for(name, operation_type):
+    children = _operation_children.get((name, operation_type))
+    if children is None:
+        with _lock:
+            # Operation names come from clients; past the limit they share one series.
+            if len(_operation_children) >= crm_setting('GRAPHQL_METRICS_MAX_OPERATIONS'):
+                name = 'other'
+            labels = (name, operation_type)
+            children = _operation_children.get(labels)
+            if children is None:
+                children = (
+                    REQUEST_DURATION.labels(*labels),
+                    ERRORS.labels(*labels),
+                    SQL_QUERIES.labels(*labels),
+                )
+                _operation_children[labels] = children
+    return children
+
+
+class OperationMetrics:
+    """Times one GraphQL operation and counts its SQL statements.
+
+    Set ``operation_ast`` and ``result`` inside the ``with`` block; they
+    label the sample and decide whether it counts as an error.
+    """
+
+    __slots__ = ('operation_ast', 'result', '_sql', '_token', '_start')
+
+    def __enter__(self):
+        self.operation_ast = None
+        self.result = None
+        self._sql = [0]
+        self._token = _sql_count.set(self._sql)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        _sql_count.reset(self._token)
+        if exc_type is None and self.operation_ast is None and self.result is None:
+            # Nothing ran: GraphiQL was rendered instead.
+            return
+        if self.operation_ast is None:
+            # Rejected before an operation was picked: unparsable, invalid or too costly.
+            name = operation_type = 'unknown'
+        else:
+            name = self.operation_ast.name.value if self.operation_ast.name else 'anonymous'
+            if len(name) > 64:
+                name = 'other'
+            operation_type = self.operation_ast.operation.value
+        duration_child, errors_child, sql_child = _children_for(name, operation_type)
+        duration_child.observe(duration)
+        sql_child.observe(self._sql[0])
+        if exc_type is not None or (self.result is not None and self.result.errors):
+            errors_child.inc()
+
+
+def record_cache_lookup(cache, hit):
+    key = (cache, hit)
+    child = _cache_children.get(key)
+    if child is None:
+        child = _cache_children[key] = CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss')
+    child.inc()
+
+
+def record_rows_returned(connection_type, rows):
+    child = _rows_children.get(connection_type)
+    if child is None:
+        child = _rows_children[connection_type] = ROWS_RETURNED.labels(connection_type.__name__)
+    child.inc(rows)
+
+
+def render():
+    """``(body, content_type)`` of the Prometheus text exposition."""
+    registry = REGISTRY
+    if os.environ.get(MULTIPROCESS_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,107 @@
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphql import FieldNode, FragmentSpreadNode, InlineFragmentNode, get_named_type
+
+
+def optimize(queryset, info):
+    """Restrict ``queryset`` to what the current field selects.
+
+    Scalar fields become ``only()`` columns, forward foreign keys become
+    ``select_related`` joins and many-valued relations become
+    ``Prefetch`` objects whose querysets are narrowed the same way. Fields
+    that do not map onto a model field (``__typename``, custom resolvers)
+    are left alone. Connection fields are followed through ``edges.node``.
+    """
+    field_nodes = list(info.field_nodes)
+    return_type = get_named_type(info.return_type)
+    if 'edges' in getattr(return_type, 'fields', {}):
+        edges = _collect_fields(field_nodes, info).get('edges', [])
+        field_nodes = _collect_fields(edges, info).get('node', [])
+
+    only, related, prefetches = _plan(queryset.model, field_nodes, info)
+    queryset = queryset.only(*only)
+    if related:
+        queryset = queryset.select_related(*related)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    return queryset
+
+
+def prefetched(instance, accessor):
+    """Return the prefetched rows of ``instance.<accessor>``, or None if not prefetched."""
+    if not getattr(instance, '_prefetched_objects_cache', None):
+        return None
+    # A related manager hands back the prefetched queryset itself, already evaluated.
+    rows = getattr(instance, accessor).all()
+    return list(rows) if rows._result_cache is not None else None
+
+
+def _collect_fields(field_nodes, info):
+    """Group the sub-fields selected by ``field_nodes`` by field name, expanding fragments."""
+    fields = {}
+
+    def visit(selection_set):
+        if selection_set is None:
+            return
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                fields.setdefault(selection.name.value, []).append(selection)
+            elif isinstance(selection, InlineFragmentNode):
+                visit(selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                visit(info.fragments[selection.name.value].selection_set)
+
+    for node in field_nodes:
+        visit(node.selection_set)
+    return fields
+
+
+def _model_fields(model):
+    fields = {}
+    for field in model._meta.get_fields():
+        if field.auto_created and not field.concrete:
+            fields[field.get_accessor_name()] = field
+        else:
+            fields[field.name] = field
+    return fields
+
+
+def _plan(model, field_nodes, info):
+    """Return the ``only`` columns, ``select_related`` paths and prefetches for ``model``."""
+    model_fields = _model_fields(model)
+    # Foreign key columns are always kept so loaders can batch on them.
+    only = {model._meta.pk.name}
+    only.update(f.name for f in model._meta.concrete_fields if f.is_relation)
+    related = []
+    prefetches = []
+
+    for name, nodes in _collect_fields(field_nodes, info).items():
+        accessor = to_snake_case(name)
+        field = model_fields.get(accessor)
+        if field is None:
+            continue
+        if not field.is_relation:
+            only.add(field.name)
+        elif field.many_to_many or field.one_to_many:
+            sub_only, sub_related, sub_prefetches = _plan(field.related_model, nodes, info)
+            if field.one_to_many:
+                # The prefetch matches rows back to their parent on this column.
+                sub_only.add(field.field.name)
+            queryset = field.related_model._default_manager.only(*sub_only)
+            if sub_related:
+                queryset = queryset.select_related(*sub_related)
+            if sub_prefetches:
+                queryset = queryset.prefetch_related(*sub_prefetches)
+            prefetches.append(Prefetch(accessor, queryset=queryset))
+        elif field.concrete:
+            sub_only, sub_related, sub_prefetches = _plan(field.related_model, nodes, info)
+            only.add(field.name)
+            only.update(f'{field.name}__{column}' for column in sub_only)
+            related.append(field.name)
+            related.extend(f'{field.name}__{path}' for path in sub_related)
+            prefetches.extend(
+                Prefetch(f'{field.name}__{p.prefetch_through}', queryset=p.queryset)
+                for p in sub_prefetches
+            )
+
+    return only, related, prefetches
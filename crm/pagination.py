@@ -0,0 +1,256 @@
+import base64
+import json
+
+import graphene
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db import connection as db_connection
+from django.db.models import F, IntegerField, Q
+from graphene import relay
+from graphql import GraphQLError
+
+from crm.conf import crm_setting
+from crm.metrics import record_rows_returned
+
+CURSOR_PREFIX = 'keyset:'
+
+# The sort value of a ranked hit's cursor.
+RANK_FIELD = IntegerField()
+
+
+def encode_cursor(pk, value=None):
+    """Encode a row's position: its primary key, after its sort value if any."""
+    if value is None:
+        return base64.b64encode(f'{CURSOR_PREFIX}{pk}'.encode()).decode()
+    position = json.dumps([str(value), pk])
+    return base64.b64encode(f'{CURSOR_PREFIX}{position}'.encode()).decode()
+
+
+def decode_cursor(cursor, field=None):
+    """Return the primary key in ``cursor``, or ``(value, pk)`` when sorting by ``field``."""
+    try:
+        value = base64.b64decode(cursor.encode()).decode()
+    except (ValueError, UnicodeDecodeError):
+        value = ''
+    if not value.startswith(CURSOR_PREFIX):
+        raise GraphQLError(f'Invalid cursor: {cursor!r}')
+    position = value[len(CURSOR_PREFIX):]
+    if field is None:
+        if not position.isdigit():
+            raise GraphQLError(f'Invalid cursor: {cursor!r}')
+        return int(position)
+    try:
+        sort_value, pk = json.loads(position)
+        return field.to_python(sort_value), int(pk)
+    except (ValueError, TypeError, ValidationError):
+        raise GraphQLError(f'Invalid cursor: {cursor!r}')
+
+
+def estimate_count(queryset):
+    """Return the planner's row estimate for an unfiltered table.
+
+    Falls back to an exact COUNT(*) when the queryset is filtered or the
+    database keeps no statistics for the table.
+    """
+    if queryset.query.where:
+        return queryset.count()
+    table = queryset.model._meta.db_table
+    with db_connection.cursor() as cursor:
+        if db_connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            row = cursor.fetchone()
+            if row and row[0] >= 0:
+                return row[0]
+        elif db_connection.vendor == 'sqlite':
+            cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone():
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table])
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+    return queryset.count()
+
+
+class CountableConnection(relay.Connection):
+    class Meta:
+        abstract = True
+
+    total_count = graphene.Int(
+        estimate=graphene.Boolean(default_value=False),
+        description='Rows matching the filters. Pass estimate: true to read '
+                    'the planner statistics instead of running COUNT(*).',
+    )
+
+    def resolve_total_count(self, info, estimate=False):
+        if getattr(self, 'asynchronous', False):
+            return self.resolve_total_count_async(estimate)
+        if estimate:
+            return estimate_count(self.queryset)
+        return self.queryset.count()
+
+    async def resolve_total_count_async(self, estimate):
+        if estimate:
+            return await sync_to_async(estimate_count)(self.queryset)
+        return await self.queryset.acount()
+
+
+class KeysetConnectionField(graphene.Field):
+    """A connection field taking the Relay ``first/after/last/before`` arguments."""
+
+    def __init__(self, type_, *args, **kwargs):
+        kwargs.setdefault('first', graphene.Int())
+        kwargs.setdefault('after', graphene.String())
+        kwargs.setdefault('last', graphene.Int())
+        kwargs.setdefault('before', graphene.String())
+        super().__init__(type_, *args, **kwargs)
+
+
+def paginate(queryset, connection_type, first=None, after=None, last=None, before=None,
+             order_by='pk'):
+    """Slice ``queryset`` into a page of ``connection_type`` by keyset.
+
+    Rows are sorted by ``order_by`` (a field name, ``-`` for descending) and
+    then by primary key. Cursors hold the sort key of their row and pages
+    are fetched with ``(field, pk) > after`` / ``< before`` rather than
+    OFFSET, so with an index on the field a deep page costs the same range
+    scan as the first one.
+    """
+    page, ordering, first, last = _page(queryset, first, after, last, before, order_by)
+    return _connection(queryset, connection_type, list(page), ordering, first, after, last, before)
+
+
+async def apaginate(queryset, connection_type, first=None, after=None, last=None, before=None,
+                    order_by='pk'):
+    """``paginate`` for async resolvers; the page is fetched with the async ORM."""
+    page, ordering, first, last = _page(queryset, first, after, last, before, order_by)
+    rows = [row async for row in page]
+    connection = _connection(queryset, connection_type, rows, ordering, first, after, last, before)
+    connection.asynchronous = True
+    return connection
+
+
+def paginate_ranked(queryset, connection_type, search, first=None, after=None):
+    """Page through ranked hits, forwards only.
+
+    ``search(limit, after)`` returns up to ``limit`` ``(rank, pk)`` pairs,
+    best first, that come after the ``(rank, pk)`` position ``after`` (None
+    for the first page). The page's rows are read from ``queryset`` by
+    primary key; cursors hold the rank and the primary key of their row.
+    """
+    first, _ = _page_sizes(first, None)
+    hits = search(first + 1, decode_cursor(after, RANK_FIELD) if after is not None else None)
+    rows = queryset.in_bulk([pk for _, pk in hits[:first]])
+    return _ranked_connection(connection_type, hits, rows, first, after)
+
+
+async def apaginate_ranked(queryset, connection_type, search, first=None, after=None):
+    """``paginate_ranked`` for async resolvers; ``search`` runs in a worker thread."""
+    first, _ = _page_sizes(first, None)
+    position = decode_cursor(after, RANK_FIELD) if after is not None else None
+    hits = await sync_to_async(search)(first + 1, position)
+    rows = await queryset.ain_bulk([pk for _, pk in hits[:first]])
+    return _ranked_connection(connection_type, hits, rows, first, after)
+
+
+def _ranked_connection(connection_type, hits, rows, first, after):
+    # A hit whose row was deleted since the search is left out.
+    edges = [
+        connection_type.Edge(node=rows[pk], cursor=encode_cursor(pk, rank))
+        for rank, pk in hits[:first]
+        if pk in rows
+    ]
+    connection = connection_type(
+        edges=edges,
+        page_info=relay.PageInfo(
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+            has_previous_page=after is not None,
+            has_next_page=len(hits) > first,
+        ),
+    )
+    connection.nodes = [edge.node for edge in edges]
+    record_rows_returned(connection_type, len(edges))
+    return connection
+
+
+def _seek(ordering, cursor, forward):
+    """The WHERE clause selecting the rows after (or before) ``cursor``."""
+    field, descending = ordering
+    lookup = 'gt' if forward != descending else 'lt'
+    if field is None:
+        return Q(**{f'pk__{lookup}': decode_cursor(cursor)})
+    value, pk = decode_cursor(cursor, field)
+    return Q(**{f'{field.name}__{lookup}': value}) | Q(**{field.name: value, f'pk__{lookup}': pk})
+
+
+def _page_sizes(first, last):
+    max_page_size = crm_setting('GRAPHQL_MAX_PAGE_SIZE')
+    for name, value in (('first', first), ('last', last)):
+        if value is not None and not 0 <= value <= max_page_size:
+            raise GraphQLError(f'`{name}` must be between 0 and {max_page_size}.')
+    if first is None and last is None:
+        first = crm_setting('GRAPHQL_DEFAULT_PAGE_SIZE')
+    return first, last
+
+
+def _page(queryset, first, after, last, before, order_by):
+    """Return the unevaluated page query with one extra row, the ordering and the page sizes."""
+    first, last = _page_sizes(first, last)
+
+    descending = order_by.startswith('-')
+    name = order_by.lstrip('-')
+    field = None if name == 'pk' else queryset.model._meta.get_field(name)
+    ordering = (field, descending)
+
+    window = queryset
+    if after is not None:
+        window = window.filter(_seek(ordering, after, forward=True))
+    if before is not None:
+        window = window.filter(_seek(ordering, before, forward=False))
+    if field is not None:
+        # Selected even when the optimizer deferred the field, for the cursors.
+        window = window.annotate(keyset_value=F(field.name))
+
+    keys = ['pk'] if field is None else [field.name, 'pk']
+    # Fetching the last rows walks the index backwards; the page is reversed afterwards.
+    backwards = first is None
+    if descending != backwards:
+        keys = [f'-{key}' for key in keys]
+    limit = last if backwards else first
+    return window.order_by(*keys)[:limit + 1], ordering, first, last
+
+
+def _connection(queryset, connection_type, rows, ordering, first, after, last, before):
+    if first is not None:
+        has_next_page = len(rows) > first
+        rows = rows[:first]
+        has_previous_page = after is not None
+        if last is not None:
+            has_previous_page = has_previous_page or len(rows) > last
+            rows = rows[max(len(rows) - last, 0):]
+    else:
+        has_previous_page = len(rows) > last
+        rows = rows[:last][::-1]
+        has_next_page = before is not None
+
+    field, _ = ordering
+    edges = [
+        connection_type.Edge(
+            node=row,
+            cursor=encode_cursor(row.pk, row.keyset_value if field is not None else None),
+        )
+        for row in rows
+    ]
+    connection = connection_type(
+        edges=edges,
+        page_info=relay.PageInfo(
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+            has_previous_page=has_previous_page,
+            has_next_page=has_next_page,
+        ),
+    )
+    connection.queryset = queryset
+    connection.nodes = rows
+    record_rows_returned(connection_type, len(rows))
+    return connection
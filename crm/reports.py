@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.db.models.functions import Trunc
+
+from crm.models import Order
+
+PERIODS = ('day', 'week', 'month')
+
+CENTS = Decimal('0.01')
+
+
+def orders_placed(start=None, end=None):
+    """Orders placed in ``[start, end)``; either bound may be None."""
+    orders = Order.objects.all()
+    if start is not None:
+        orders = orders.filter(order_date__gte=start)
+    if end is not None:
+        orders = orders.filter(order_date__lt=end)
+    return orders
+
+
+def period_totals(start=None, end=None, period='day'):
+    """Order count and revenue per ``period`` for orders placed in ``[start, end)``."""
+    if period not in PERIODS:
+        raise ValueError(f'period must be one of {", ".join(PERIODS)}')
+
+    return (
+        orders_placed(start, end).annotate(start=Trunc('order_date', period))
+        .values('start')
+        .annotate(order_count=Count('pk'), revenue=Sum('total_amount'))
+        .order_by('start')
+    )
+
+
+def crm_report(start=None, end=None, period='day'):
+    """Return the CRM totals for orders placed in ``[start, end)``.
+
+    Orders are grouped by ``Trunc('order_date', period)`` in one statement
+    and the totals are summed from those rows as Decimals; a second
+    statement counts the distinct customers of those orders. The result's
+    size depends on the number of periods, not on the number of orders.
+    """
+    periods = list(period_totals(start, end, period))
+    for row in periods:
+        # SQLite sums decimals as floats; rounding to cents restores the exact value.
+        row['revenue'] = row['revenue'].quantize(CENTS)
+
+    return {
+        'customer_count': orders_placed(start, end).aggregate(
+            customers=Count('customer_id', distinct=True),
+        )['customers'],
+        'order_count': sum(row['order_count'] for row in periods),
+        'revenue': sum((row['revenue'] for row in periods), Decimal('0')),
+        'periods': periods,
+    }
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from graphql import TypeInfo, TypeInfoVisitor, Visitor, get_named_type, print_ast, visit
+
+from crm.conf import crm_setting
+from crm.document_cache import schema_version
+
+# Root fields that return plain scalars computed from these tables.
+ROOT_FIELD_TABLES = {
+    'hello': (),
+    'totalCustomers': ('crm.Customer',),
+    'totalOrders': ('crm.Order',),
+    'totalRevenue': ('crm.Order',),
+    'crmReport': ('crm.Customer', 'crm.Order'),
+    'searchCustomers': ('crm.Customer',),
+}
+
+# Every table a response may depend on; used for fields nobody declared.
+ALL_TABLES = ('crm.Customer', 'crm.Order', 'crm.Product')
+
+
+def _cache():
+    return caches[crm_setting('GRAPHQL_RESPONSE_CACHE_ALIAS')]
+
+
+def _version_key(table):
+    return f'graphql:table:{table}'
+
+
+def invalidate(*models):
+    """Expire every cached response that read from the tables of ``models``.
+
+    The bump waits for the surrounding transaction to commit, so a reader
+    cannot re-cache rows that are about to change.
+    """
+    tables = [model._meta.label for model in models]
+    transaction.on_commit(lambda: _bump(tables))
+
+
+def _bump(tables):
+    cache = _cache()
+    for table in tables:
+        try:
+            cache.incr(_version_key(table))
+        except ValueError:
+            # Start from the clock, not 0, so an evicted counter never comes
+            # back at a value that old entries were stored under.
+            cache.set(_version_key(table), time.time_ns(), None)
+
+
+def _model_of(named_type):
+    """The model behind a DjangoObjectType, or behind the nodes of a connection."""
+    meta = getattr(getattr(named_type, 'graphene_type', None), '_meta', None)
+    if getattr(meta, 'model', None) is not None:
+        return meta.model
+    node = getattr(meta, 'node', None)
+    return getattr(getattr(node, '_meta', None), 'model', None)
+
+
+class _TableCollector(Visitor):
+    def __init__(self, schema, type_info):
+        super().__init__()
+        self.schema = schema
+        self.type_info = type_info
+        self.tables = set()
+
+    def enter_field(self, node, *args):
+        model = _model_of(get_named_type(self.type_info.get_type()))
+        if model is not None:
+            self.tables.add(model._meta.label)
+        elif self.type_info.get_parent_type() is self.schema.query_type:
+            self.tables.update(ROOT_FIELD_TABLES.get(node.name.value, ALL_TABLES))
+
+
+def document_tables(schema, document):
+    """Return the labels of the models whose rows ``document`` can read."""
+    type_info = TypeInfo(schema)
+    collector = _TableCollector(schema, type_info)
+    visit(document, TypeInfoVisitor(type_info, collector))
+    return sorted(collector.tables)
+
+
+class ResponseCache:
+    """Cache of query results in Django's cache framework.
+
+    Keys combine the normalized document, variables, operation name and the
+    schema version with the current version counter of every table the
+    document reads. Saving, deleting or bulk-changing a row bumps its
+    table's counter (crm/signals.py), which orphans the stale entries until
+    they expire.
+    """
+
+    def key(self, schema, document, variables, operation_name):
+        tables = document_tables(schema, document)
+        cache = _cache()
+        version_keys = [_version_key(table) for table in tables]
+        versions = cache.get_many(version_keys)
+        for version_key in version_keys:
+            if version_key not in versions:
+                cache.add(version_key, time.time_ns(), None)
+                versions[version_key] = cache.get(version_key)
+        request_hash = hashlib.sha256(json.dumps(
+            [print_ast(document), variables or {}, operation_name],
+            sort_keys=True, cls=DjangoJSONEncoder,
+        ).encode()).hexdigest()
+        version = '.'.join(str(versions[k]) for k in version_keys)
+        return f'graphql:response:{schema_version(schema)}:{request_hash}:{version}'
+
+    def get(self, key):
+        return _cache().get(key)
+
+    def set(self, key, data):
+        _cache().set(key, data, crm_setting('GRAPHQL_RESPONSE_CACHE_TIMEOUT'))
+
+
+response_cache = ResponseCache()
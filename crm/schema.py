@@ -1,76 +1,259 @@
+from functools import partial
+
 import graphene
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
 from graphene_django import DjangoObjectType
-from django.db import models
-from crm.models import Product, Customer, Order  # Add Product import
+from graphql import GraphQLError
+from crm.models import Product, Customer, Order, CrmStats
+from crm.bulk import restock_low_stock
+from crm.loaders import get_loaders
+from crm.optimizer import optimize, prefetched
+from crm.reports import crm_report
+from crm.pagination import (
+    CountableConnection, KeysetConnectionField, apaginate, apaginate_ranked, paginate, paginate_ranked,
+)
+from crm.search import search_customers
 
 # Define ObjectTypes
+# Relations come from the optimizer's joins and prefetches when the root
+# resolver made them, and otherwise from the per-request loaders, so nested
+# selections cost one query per level instead of one per row.
 class ProductType(DjangoObjectType):
     class Meta:
         model = Product
         fields = "__all__"
 
+    def resolve_order_set(self, info):
+        orders = prefetched(self, 'order_set')
+        if orders is None:
+            orders = get_loaders(info).orders_by_product.load(self.pk)
+        return orders
+
 class CustomerType(DjangoObjectType):
     class Meta:
         model = Customer
         fields = "__all__"
 
+    def resolve_order_set(self, info):
+        orders = prefetched(self, 'order_set')
+        if orders is None:
+            orders = get_loaders(info).orders_by_customer.load(self.pk)
+        return orders
+
 class OrderType(DjangoObjectType):
     class Meta:
         model = Order
         fields = "__all__"
 
+    def resolve_customer(self, info):
+        if Order.customer.is_cached(self):
+            return self.customer
+        return get_loaders(info).customer.load(self.customer_id)
+
+    def resolve_products(self, info):
+        products = prefetched(self, 'products')
+        if products is None:
+            products = get_loaders(info).products_by_order.load(self.pk)
+        return products
+
+class ProductConnection(CountableConnection):
+    class Meta:
+        node = ProductType
+
+class CustomerConnection(CountableConnection):
+    class Meta:
+        node = CustomerType
+
+class OrderConnection(CountableConnection):
+    class Meta:
+        node = OrderType
+
+class CustomerSearchConnection(graphene.relay.Connection):
+    class Meta:
+        node = CustomerType
+
+class OrderOrderBy(graphene.Enum):
+    ID_ASC = "pk"
+    ID_DESC = "-pk"
+    ORDER_DATE_ASC = "order_date"
+    ORDER_DATE_DESC = "-order_date"
+
+def filter_orders(orders, order_date_gte=None, order_date_lte=None, customer_id=None, min_total=None):
+    """Apply the filter arguments of the orders field as WHERE clauses."""
+    if order_date_gte is not None:
+        orders = orders.filter(order_date__gte=order_date_gte)
+    if order_date_lte is not None:
+        orders = orders.filter(order_date__lte=order_date_lte)
+    if customer_id is not None:
+        try:
+            orders = orders.filter(customer_id=int(customer_id))
+        except ValueError:
+            raise GraphQLError(f"Invalid customerId: {customer_id}")
+    if min_total is not None:
+        orders = orders.filter(total_amount__gte=min_total)
+    return orders
+
+class ReportPeriod(graphene.Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+class PeriodTotals(graphene.ObjectType):
+    start = graphene.DateTime()
+    order_count = graphene.Int()
+    revenue = graphene.Decimal()
+
+class CrmReport(graphene.ObjectType):
+    customer_count = graphene.Int(description="Distinct customers who placed an order in the window.")
+    order_count = graphene.Int()
+    revenue = graphene.Decimal()
+    periods = graphene.List(PeriodTotals)
+
 # Queries
 class Query(graphene.ObjectType):
     hello = graphene.String()
-    products = graphene.List(ProductType)
-    customers = graphene.List(CustomerType)
-    orders = graphene.List(OrderType)
+    products = KeysetConnectionField(ProductConnection)
+    customers = KeysetConnectionField(CustomerConnection)
+    orders = KeysetConnectionField(
+        OrderConnection,
+        order_date_gte=graphene.DateTime(),
+        order_date_lte=graphene.DateTime(),
+        customer_id=graphene.ID(),
+        min_total=graphene.Decimal(),
+        order_by=OrderOrderBy(default_value=OrderOrderBy.ID_ASC),
+    )
+    search_customers = graphene.Field(
+        CustomerSearchConnection,
+        query=graphene.String(required=True),
+        first=graphene.Int(),
+        after=graphene.String(),
+        description="Customers with a word starting with every term of query in their name, "
+                    "email or phone. Names starting with the first term come first, then the "
+                    "other name matches, then email and phone matches; ties are in id order.",
+    )
     total_customers = graphene.Int()
     total_orders = graphene.Int()
     total_revenue = graphene.Float()
+    crm_report = graphene.Field(
+        CrmReport,
+        from_=graphene.DateTime(name="from"),
+        to=graphene.DateTime(),
+        period=ReportPeriod(default_value=ReportPeriod.DAY),
+        description="Customer, order and revenue totals for orders placed in [from, to), "
+                    "computed with SQL aggregates.",
+    )
     
     def resolve_hello(self, info):
         return "Hello from GraphQL!"
     
-    def resolve_products(self, info):
-        return Product.objects.all()
+    def resolve_products(self, info, **kwargs):
+        connection = paginate(optimize(Product.objects.all(), info), ProductConnection, **kwargs)
+        get_loaders(info).prime_products(connection.nodes)
+        return connection
     
-    def resolve_customers(self, info):
-        return Customer.objects.all()
+    def resolve_customers(self, info, **kwargs):
+        connection = paginate(optimize(Customer.objects.all(), info), CustomerConnection, **kwargs)
+        get_loaders(info).prime_customers(connection.nodes)
+        return connection
     
-    def resolve_orders(self, info):
-        return Order.objects.all()
+    def resolve_orders(self, info, order_by, first=None, after=None, last=None, before=None, **filters):
+        orders = filter_orders(optimize(Order.objects.all(), info), **filters)
+        connection = paginate(orders, OrderConnection, first, after, last, before, order_by=order_by.value)
+        get_loaders(info).prime_orders(connection.nodes)
+        return connection
+    
+    def resolve_search_customers(self, info, query, first=None, after=None):
+        search = partial(search_customers, query)
+        connection = paginate_ranked(
+            optimize(Customer.objects.all(), info), CustomerSearchConnection, search, first, after,
+        )
+        get_loaders(info).prime_customers(connection.nodes)
+        return connection
     
+    # The totals read the CrmStats row instead of scanning the tables.
     def resolve_total_customers(self, info):
-        return Customer.objects.count()
+        return CrmStats.current().customer_count
     
     def resolve_total_orders(self, info):
-        return Order.objects.count()
+        return CrmStats.current().order_count
     
     def resolve_total_revenue(self, info):
-        return Order.objects.aggregate(
-            total=models.Sum('total_amount')
-        )['total'] or 0
+        return CrmStats.current().total_revenue
+    
+    def resolve_crm_report(self, info, period, from_=None, to=None):
+        return crm_report(from_, to, period.value)
+
+# The same fields for the ASGI endpoint, resolved with the async ORM.
+# graphql-core awaits the root fields of a query together, so independent
+# fields no longer wait for each other's queries.
+class AsyncQuery(Query):
+    class Meta:
+        name = "Query"
+    
+    async def resolve_products(self, info, **kwargs):
+        connection = await apaginate(optimize(Product.objects.all(), info), ProductConnection, **kwargs)
+        get_loaders(info).prime_products(connection.nodes)
+        return connection
+    
+    async def resolve_customers(self, info, **kwargs):
+        connection = await apaginate(optimize(Customer.objects.all(), info), CustomerConnection, **kwargs)
+        get_loaders(info).prime_customers(connection.nodes)
+        return connection
+    
+    async def resolve_orders(self, info, order_by, first=None, after=None, last=None, before=None, **filters):
+        orders = filter_orders(optimize(Order.objects.all(), info), **filters)
+        connection = await apaginate(orders, OrderConnection, first, after, last, before, order_by=order_by.value)
+        get_loaders(info).prime_orders(connection.nodes)
+        return connection
+    
+    async def resolve_search_customers(self, info, query, first=None, after=None):
+        search = partial(search_customers, query)
+        connection = await apaginate_ranked(
+            optimize(Customer.objects.all(), info), CustomerSearchConnection, search, first, after,
+        )
+        get_loaders(info).prime_customers(connection.nodes)
+        return connection
+    
+    async def resolve_total_customers(self, info):
+        return (await CrmStats.acurrent()).customer_count
+    
+    async def resolve_total_orders(self, info):
+        return (await CrmStats.acurrent()).order_count
+    
+    async def resolve_total_revenue(self, info):
+        return (await CrmStats.acurrent()).total_revenue
+    
+    async def resolve_crm_report(self, info, period, from_=None, to=None):
+        return await sync_to_async(crm_report)(from_, to, period.value)
 
 # Mutations
 class UpdateLowStockProducts(graphene.Mutation):
     class Arguments:
-        pass
+        threshold = graphene.Int(default_value=10)
+        increment = graphene.Int(default_value=10)
+        product_ids = graphene.List(graphene.ID)
     
     success = graphene.Boolean()
     message = graphene.String()
     updated_products = graphene.List(graphene.String)
     
-    def mutate(self, info):
-        # Get products with stock less than 10
-        low_stock_products = Product.objects.filter(stock__lt=10)
-        updated_products = []
+    def mutate(self, info, threshold, increment, product_ids=None):
+        if increment <= 0:
+            return UpdateLowStockProducts(
+                success=False,
+                message="Increment must be a positive number",
+                updated_products=[]
+            )
         
-        for product in low_stock_products:
-            old_stock = product.stock
-            product.stock += 10  # Increment stock by 10
-            product.save()
-            updated_products.append(f"{product.name}: {old_stock} -> {product.stock}")
+        # One UPDATE for every product with stock below the threshold
+        try:
+            restocked = restock_low_stock(threshold, increment, product_ids)
+        except ValidationError as e:
+            return UpdateLowStockProducts(success=False, message=e.messages[0], updated_products=[])
+        updated_products = [
+            f"{name}: {old_stock} -> {new_stock}" for name, old_stock, new_stock in restocked
+        ]
         
         return UpdateLowStockProducts(
             success=True,
@@ -82,3 +265,4 @@ class Mutation(graphene.ObjectType):
     update_low_stock_products = UpdateLowStockProducts.Field()
 
 schema = graphene.Schema(query=Query, mutation=Mutation)
+async_schema = graphene.Schema(query=AsyncQuery, mutation=Mutation)
@@ -0,0 +1,233 @@
+import re
+from abc import ABC, abstractmethod
+
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from crm.conf import crm_setting
+from crm.models import Customer
+
+# Rank tiers, best first. Within a tier hits are ordered by id.
+NAME_PREFIX, NAME, CONTACT = TIERS = range(3)
+
+TERM_RE = re.compile(r'\w+')
+MAX_TERMS = 8
+
+# CUSTOMER_SEARCH_BACKEND -> backend instance; None is the database's default.
+_backends = {}
+
+
+def search_terms(query):
+    """The lowercased words of ``query``; each one matches the start of a word."""
+    return TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+class SearchBackend(ABC):
+    """Finds customers by name, email and phone for searchCustomers.
+
+    Every term of a query has to match the start of a word. Hits are
+    ranked in tiers: names starting with the first term, then the other
+    names containing every term, then emails and phones containing every
+    term. Inside a tier they are ordered by id, so a page is a keyset seek
+    that stops as soon as it is full instead of scoring every match.
+
+    Backends keep their index in sync inside the database, with triggers
+    or indexes on the customer table itself, so bulk_create(), update()
+    and raw SQL are covered as well as save() and delete().
+    """
+
+    def install(self):
+        """Create the index if it is missing; run after ``migrate``."""
+
+    def rebuild(self):
+        """Drop the index and build it again from the customer table."""
+
+    @abstractmethod
+    def tier(self, terms, tier, after, limit):
+        """Ids above ``after`` of up to ``limit`` customers in ``tier``, ascending."""
+
+    def search(self, query, limit, after=None):
+        """``(tier, id)`` of the first ``limit`` hits past the ``(tier, id)`` position ``after``."""
+        terms = search_terms(query)
+        hits = []
+        if not terms or limit <= 0:
+            return hits
+        after_tier, after_pk = after or (NAME_PREFIX, 0)
+        for tier in TIERS:
+            if tier < after_tier:
+                continue
+            pks = self.tier(terms, tier, after_pk if tier == after_tier else 0, limit - len(hits))
+            hits.extend((tier, pk) for pk in pks)
+            if len(hits) >= limit:
+                break
+        return hits
+
+
+class RegexBackend(SearchBackend):
+    """Case-insensitive regular expressions on the customer table.
+
+    Works on any database without an index, so rare terms read the whole
+    table; the fallback when neither of the others fits.
+    """
+
+    def word_start(self, term):
+        # PostgreSQL spells the start of a word \m; Python (SQLite) and MySQL \b.
+        return (r'\m' if connection.vendor == 'postgresql' else r'\b') + re.escape(term)
+
+    def name_matches(self, terms):
+        return Q(*(Q(name__iregex=self.word_start(term)) for term in terms))
+
+    def tier(self, terms, tier, after, limit):
+        name_prefix = Q(name__iregex='^' + re.escape(terms[0])) & self.name_matches(terms[1:])
+        if tier == NAME_PREFIX:
+            condition = name_prefix
+        elif tier == NAME:
+            condition = self.name_matches(terms) & ~name_prefix
+        else:
+            condition = Q(*(
+                Q(email__iregex=self.word_start(term)) | Q(phone__iregex=self.word_start(term))
+                for term in terms
+            )) & ~self.name_matches(terms)
+        customers = Customer.objects.filter(condition, pk__gt=after).order_by('pk')
+        return list(customers.values_list('pk', flat=True)[:limit])
+
+
+class TrigramBackend(RegexBackend):
+    """The regular expressions of RegexBackend, served by pg_trgm GIN indexes on PostgreSQL."""
+
+    COLUMNS = ('name', 'email', 'phone')
+
+    def index_name(self, column):
+        return f'{Customer._meta.db_table}_{column}_trgm'
+
+    def install(self):
+        table = connection.ops.quote_name(Customer._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for column in self.COLUMNS:
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {connection.ops.quote_name(self.index_name(column))} '
+                    f'ON {table} USING gin ({connection.ops.quote_name(column)} gin_trgm_ops)'
+                )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            for column in self.COLUMNS:
+                cursor.execute(f'DROP INDEX IF EXISTS {connection.ops.quote_name(self.index_name(column))}')
+        self.install()
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """SQLite FTS5 tables over the customer table, kept in sync by triggers.
+
+    Names and contact details get separate tables, so a term in nearly
+    every email (a mail domain) never has to be read past to rank names.
+    FTS5 streams prefix terms in id order only from a prefix index; terms
+    up to PREFIX_LENGTH characters have one, longer ones are merged in
+    full and cost time in proportion to the customers containing them.
+    """
+
+    PREFIX_LENGTH = 8
+    TOKENIZER = 'unicode61 remove_diacritics 2'
+    # FTS table -> the customer columns it indexes.
+    TABLES = {
+        'crm_customer_search_name': ('name',),
+        'crm_customer_search_contact': ('email', 'phone'),
+    }
+    NAME_TABLE, CONTACT_TABLE = TABLES
+
+    def _statements(self):
+        customers = Customer._meta.db_table
+        prefixes = ' '.join(str(length) for length in range(1, self.PREFIX_LENGTH + 1))
+        for table, columns in self.TABLES.items():
+            names = ', '.join(columns)
+            new = ', '.join(f'new.{column}' for column in columns)
+            old = ', '.join(f'old.{column}' for column in columns)
+            delete = f"INSERT INTO {table}({table}, rowid, {names}) VALUES ('delete', old.id, {old});"
+            insert = f'INSERT INTO {table}(rowid, {names}) VALUES (new.id, {new});'
+            yield (
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({names}, "
+                f"content='{customers}', content_rowid='id', "
+                f"tokenize='{self.TOKENIZER}', prefix='{prefixes}')"
+            )
+            yield f'CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON {customers} BEGIN {insert} END'
+            yield f'CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON {customers} BEGIN {delete} END'
+            yield (
+                f'CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF {names} ON {customers} '
+                f'BEGIN {delete} {insert} END'
+            )
+
+    def install(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN (%s, %s)",
+                list(self.TABLES),
+            )
+            missing = cursor.fetchone()[0] < len(self.TABLES)
+            for statement in self._statements():
+                cursor.execute(statement)
+            if missing:
+                # An external-content table starts empty even over existing rows.
+                for table in self.TABLES:
+                    cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            for table in self.TABLES:
+                for trigger in ('insert', 'delete', 'update'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {table}_{trigger}')
+                cursor.execute(f'DROP TABLE IF EXISTS {table}')
+        self.install()
+
+    def tier(self, terms, tier, after, limit):
+        # Quoted, so that a term is never read as FTS5 query syntax.
+        all_terms = ' AND '.join(f'"{term}"*' for term in terms)
+        name_prefix = f'^"{terms[0]}"*' + (f' AND {all_terms}' if len(terms) > 1 else '')
+        if tier == NAME_PREFIX:
+            sql = f'SELECT rowid FROM {self.NAME_TABLE} WHERE {self.NAME_TABLE} MATCH %s'
+            params = [name_prefix]
+        elif tier == NAME:
+            sql = f'SELECT rowid FROM {self.NAME_TABLE} WHERE {self.NAME_TABLE} MATCH %s'
+            params = [f'({all_terms}) NOT ({name_prefix})']
+        else:
+            sql = (
+                f'SELECT rowid FROM {self.CONTACT_TABLE} WHERE {self.CONTACT_TABLE} MATCH %s '
+                f'AND NOT EXISTS (SELECT 1 FROM {self.NAME_TABLE} WHERE {self.NAME_TABLE} MATCH %s '
+                f'AND {self.NAME_TABLE}.rowid = {self.CONTACT_TABLE}.rowid)'
+            )
+            params = [all_terms, all_terms]
+        with connection.cursor() as cursor:
+            cursor.execute(f'{sql} AND rowid > %s ORDER BY rowid LIMIT %s', params + [after, limit])
+            return [pk for pk, in cursor.fetchall()]
+
+
+def _default_backend():
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA compile_options')
+            if any(option == 'ENABLE_FTS5' for option, in cursor.fetchall()):
+                return 'crm.search.SQLiteFTSBackend'
+    elif connection.vendor == 'postgresql':
+        return 'crm.search.TrigramBackend'
+    return 'crm.search.RegexBackend'
+
+
+def get_backend():
+    """The CUSTOMER_SEARCH_BACKEND instance, or the default for the database."""
+    path = crm_setting('CUSTOMER_SEARCH_BACKEND')
+    backend = _backends.get(path)
+    if backend is None:
+        backend = _backends[path] = import_string(path or _default_backend())()
+    return backend
+
+
+def search_customers(query, limit, after=None):
+    """``search()`` of the configured backend; picking it may query the database."""
+    return get_backend().search(query, limit, after)
+
+
+def install_search_index(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """post_migrate receiver: create the search index of a new database."""
+    if using == DEFAULT_DB_ALIAS:
+        get_backend().install()
@@ -136,7 +136,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # GraphQL configuration
 GRAPHENE = {
-    'SCHEMA': 'crm.schema.schema',
+    'SCHEMA': 'alx_backend_graphql_crm.schema.schema',
     'MIDDLEWARE': [],
 }
 
@@ -199,4 +199,62 @@ CRM_SETTINGS = {
     'ORDER_REMINDERS_LOG_FILE': '/tmp/order_reminders_log.txt',
     'LOW_STOCK_UPDATES_LOG_FILE': '/tmp/low_stock_updates_log.txt',
     'CRM_REPORT_LOG_FILE': '/tmp/crm_report_log.txt',
+    # The job logs above are JSON lines (crm/joblog.py), buffered up to
+    # JOB_LOG_BUFFER_SIZE records and rotated past JOB_LOG_MAX_BYTES or
+    # JOB_LOG_MAX_AGE seconds; JOB_LOG_BACKUP_COUNT rotated files are kept.
+    # Read them with: python manage.py read_job_log <job>
+    'JOB_LOG_BUFFER_SIZE': 100,
+    'JOB_LOG_MAX_BYTES': 10 * 1024 * 1024,
+    'JOB_LOG_MAX_AGE': 7 * 24 * 60 * 60,
+    'JOB_LOG_BACKUP_COUNT': 52,
+    # Connection fields refuse pages larger than GRAPHQL_MAX_PAGE_SIZE.
+    'GRAPHQL_MAX_PAGE_SIZE': 100,
+    'GRAPHQL_DEFAULT_PAGE_SIZE': 100,
+    # Parsed and validated documents kept per process by the /graphql view.
+    'GRAPHQL_DOCUMENT_CACHE_SIZE': 256,
+    # Validation stops after this many errors, so an invalid document cannot
+    # make the server collect errors without bound.
+    'GRAPHQL_MAX_VALIDATION_ERRORS': 100,
+    # Cache alias and timeout (None = forever) for persisted query texts.
+    'GRAPHQL_PERSISTED_QUERY_CACHE': 'default',
+    'GRAPHQL_PERSISTED_QUERY_TIMEOUT': None,
+    # Opt-in cache of query results, expired by writes to the tables they read.
+    'GRAPHQL_RESPONSE_CACHE_ENABLED': False,
+    'GRAPHQL_RESPONSE_CACHE_ALIAS': 'default',
+    'GRAPHQL_RESPONSE_CACHE_TIMEOUT': 300,
+    # Operations above this cost or depth are rejected before execution.
+    # Plain list fields count as GRAPHQL_DEFAULT_LIST_SIZE items, connections
+    # as their first/last argument; GRAPHQL_FIELD_COSTS overrides the weight
+    # of single fields, e.g. {'Query.totalRevenue': 5}.
+    'GRAPHQL_MAX_QUERY_COST': 5000,
+    'GRAPHQL_MAX_QUERY_DEPTH': 10,
+    'GRAPHQL_DEFAULT_LIST_SIZE': 10,
+    'GRAPHQL_FIELD_COSTS': {},
+    # Most operations accepted in one POST sent as a JSON array.
+    'GRAPHQL_MAX_BATCH_SIZE': 10,
+    # Cron and Celery jobs run their GraphQL operations in-process; set a URL
+    # such as 'http://localhost:8000/graphql' to send them over HTTP instead.
+    'GRAPHQL_JOB_ENDPOINT': None,
+    'GRAPHQL_JOB_TIMEOUT': 30,
+    # Log resolver and SQL timings of every operation to the crm logger.
+    # Requests carrying GRAPHQL_TRACING_HEADER are traced either way, and get
+    # the timings in extensions.tracing, when DEBUG is on or the user is staff.
+    'GRAPHQL_TRACING_ENABLED': False,
+    'GRAPHQL_TRACING_HEADER': 'X-CRM-Trace',
+    # Distinct operation names labelled in /metrics; later ones count as 'other'.
+    'GRAPHQL_METRICS_MAX_OPERATIONS': 200,
+    # Operations slower than GRAPHQL_SLOW_OPERATION_MS, or running more SQL
+    # statements than GRAPHQL_SLOW_OPERATION_SQL_COUNT, are logged to the crm
+    # logger with their slowest statements (and EXPLAIN plans if enabled).
+    # None switches a budget off. Variables whose names contain one of
+    # GRAPHQL_SLOW_LOG_REDACT, and email addresses anywhere, are redacted.
+    'GRAPHQL_SLOW_OPERATION_MS': 500,
+    'GRAPHQL_SLOW_OPERATION_SQL_COUNT': 50,
+    'GRAPHQL_SLOW_LOG_STATEMENTS': 5,
+    'GRAPHQL_SLOW_LOG_EXPLAIN': False,
+    'GRAPHQL_SLOW_LOG_REDACT': ('email', 'phone', 'name', 'address', 'password', 'token', 'secret'),
+    # Dotted path of the crm.search backend behind searchCustomers and the
+    # customer admin. None picks SQLite FTS5, PostgreSQL pg_trgm or, on other
+    # databases, unindexed regular expressions.
+    'CUSTOMER_SEARCH_BACKEND': None,
 }
@@ -1,23 +1,33 @@
 import graphene
+from django.core.exceptions import ValidationError
 from graphene_django import DjangoObjectType
-from .models import Product
+from .bulk import restock_low_stock
 
 class UpdateLowStockProducts(graphene.Mutation):
     class Arguments:
-        pass
+        threshold = graphene.Int(default_value=10)
+        increment = graphene.Int(default_value=10)
+        product_ids = graphene.List(graphene.ID)
     
     success = graphene.Boolean()
     message = graphene.String()
     updated_products = graphene.List(graphene.String)
     
-    def mutate(self, info):
-        low_stock_products = Product.objects.filter(stock__lt=10)
-        updated_products = []
+    def mutate(self, info, threshold, increment, product_ids=None):
+        if increment <= 0:
+            return UpdateLowStockProducts(
+                success=False,
+                message="Increment must be a positive number",
+                updated_products=[]
+            )
         
-        for product in low_stock_products:
-            product.stock += 10
-            product.save()
-            updated_products.append(f"{product.name}: {product.stock - 10} -> {product.stock}")
+        try:
+            restocked = restock_low_stock(threshold, increment, product_ids)
+        except ValidationError as e:
+            return UpdateLowStockProducts(success=False, message=e.messages[0], updated_products=[])
+        updated_products = [
+            f"{name}: {old_stock} -> {new_stock}" for name, old_stock, new_stock in restocked
+        ]
         
         return UpdateLowStockProducts(
             success=True,
@@ -0,0 +1,35 @@
+from decimal import Decimal
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from crm.models import CrmStats, Customer, Order, OrderProduct, Product, rows_changed
+from crm.response_cache import invalidate
+
+
+# Inserts are counted by TrackedModel.save() and TrackedQuerySet.bulk_create();
+# deletes are counted here so that rows removed by a cascade are included.
+@receiver(post_delete, sender=Customer)
+def customer_deleted(sender, instance, **kwargs):
+    CrmStats.record(customers=-1)
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    CrmStats.record(orders=-1, revenue=-Decimal(instance.total_amount))
+
+
+# Any write to a table expires the cached GraphQL responses that read it.
+@receiver([post_save, post_delete, rows_changed], sender=Customer)
+@receiver([post_save, post_delete, rows_changed], sender=Product)
+@receiver([post_save, post_delete, rows_changed], sender=Order)
+def table_changed(sender, **kwargs):
+    invalidate(sender)
+
+
+# Order lines are written through Order.products or directly; deletes of
+# them report through rows_changed, so that cascades stay fast deletes.
+@receiver(m2m_changed, sender=Order.products.through)
+@receiver([post_save, rows_changed], sender=OrderProduct)
+def order_products_changed(sender, **kwargs):
+    invalidate(Order, Product)
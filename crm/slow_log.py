@@ -0,0 +1,171 @@
+import hashlib
+import heapq
+import itertools
+import logging
+import re
+import time
+from contextvars import ContextVar
+
+from django.db import connection
+from graphql import FloatValueNode, IntValueNode, StringValueNode, Visitor, print_ast, visit
+
+from crm.conf import crm_setting
+
+logger = logging.getLogger(__name__)
+
+REDACTED = '[REDACTED]'
+EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+(\.[\w-]+)+')
+
+# The SlowLog of the operation running in this context.
+_current = ContextVar('crm_slow_log', default=None)
+
+
+def _record_sql(execute, sql, params, many, context):
+    slow_log = _current.get()
+    if slow_log is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        slow_log.add_statement(time.perf_counter() - start, sql, params, many)
+
+
+def install_statement_recorder(sender, connection, **kwargs):
+    """connection_created receiver; see crm.metrics.install_sql_counter."""
+    if _record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_sql)
+
+
+class _StripLiterals(Visitor):
+    def enter_int_value(self, node, *args):
+        return IntValueNode(value='0')
+
+    def enter_float_value(self, node, *args):
+        return FloatValueNode(value='0')
+
+    def enter_string_value(self, node, *args):
+        return StringValueNode(value='')
+
+
+def document_hash(document):
+    """SHA-256 of ``document`` with its number and string literals blanked.
+
+    Operations that differ only in inline values, or in whitespace, share
+    a hash; the literals may hold personal data and stay out of the log.
+    """
+    return hashlib.sha256(print_ast(visit(document, _StripLiterals())).encode()).hexdigest()
+
+
+def redact(value, key=''):
+    """``value`` with the values of sensitive keys and any email address replaced."""
+    if any(part in key.lower() for part in crm_setting('GRAPHQL_SLOW_LOG_REDACT')):
+        return REDACTED
+    if isinstance(value, dict):
+        return {k: redact(v, str(k)) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v, key) for v in value]
+    if isinstance(value, str):
+        return EMAIL_RE.sub(REDACTED, value)
+    return value
+
+
+class SlowLog:
+    """Logs an operation that runs past GRAPHQL_SLOW_OPERATION_MS or issues
+    more than GRAPHQL_SLOW_OPERATION_SQL_COUNT statements.
+
+    Inside the ``with`` block every statement is timed and the slowest
+    GRAPHQL_SLOW_LOG_STATEMENTS kept. Set ``operation_ast``, ``document``
+    and ``result`` in the block; afterwards, if ``exceeded``, ``emit()``
+    writes one WARNING record to the ``crm.slow_log`` logger. ``emit()``
+    touches the database when GRAPHQL_SLOW_LOG_EXPLAIN is on, so async code
+    calls it through ``sync_to_async``.
+    """
+
+    def __init__(self, variables=None):
+        self.variables = variables
+        self.operation_ast = None
+        self.document = None
+        self.result = None
+        self.max_duration = crm_setting('GRAPHQL_SLOW_OPERATION_MS')
+        self.max_sql_count = crm_setting('GRAPHQL_SLOW_OPERATION_SQL_COUNT')
+        self.enabled = self.max_duration is not None or self.max_sql_count is not None
+        self.sql_count = 0
+        self.sql_duration = 0.0
+        self.duration = None
+        self._slowest = []
+        self._keep = crm_setting('GRAPHQL_SLOW_LOG_STATEMENTS')
+        self._order = itertools.count()
+
+    def __enter__(self):
+        if self.enabled:
+            self._token = _current.set(self)
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.enabled:
+            self.duration = time.perf_counter() - self._start
+            _current.reset(self._token)
+
+    def add_statement(self, duration, sql, params, many):
+        self.sql_count += 1
+        self.sql_duration += duration
+        # A min-heap of the slowest statements so far; ties keep the earlier one.
+        entry = (duration, -next(self._order), sql, None if many else params)
+        if len(self._slowest) < self._keep:
+            heapq.heappush(self._slowest, entry)
+        elif self._slowest and entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def exceeded(self):
+        if not self.enabled or self.duration is None or self.operation_ast is None:
+            return False
+        return (
+            (self.max_duration is not None and self.duration * 1000 > self.max_duration)
+            or (self.max_sql_count is not None and self.sql_count > self.max_sql_count)
+        )
+
+    def statements(self):
+        explain = crm_setting('GRAPHQL_SLOW_LOG_EXPLAIN')
+        statements = []
+        for duration, _, sql, params in sorted(self._slowest, reverse=True):
+            statement = {'sql': sql, 'durationMs': round(duration * 1000, 3)}
+            if explain and params is not None and sql.lstrip()[:6].upper() == 'SELECT':
+                statement['plan'] = self.explain(sql, params)
+            statements.append(statement)
+        return statements
+
+    @staticmethod
+    def explain(sql, params):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+                rows = cursor.fetchall()
+        except Exception as e:
+            return f'EXPLAIN failed: {e}'
+        # The plan text is the last column on both SQLite and PostgreSQL;
+        # plans can quote the parameters back.
+        return EMAIL_RE.sub(REDACTED, '\n'.join(str(row[-1]) for row in rows))
+
+    def emit(self):
+        name = self.operation_ast.name.value if self.operation_ast.name else None
+        record = {
+            'operationName': name,
+            'operationType': self.operation_ast.operation.value,
+            'documentHash': document_hash(self.document),
+            'durationMs': round(self.duration * 1000, 3),
+            'sqlCount': self.sql_count,
+            'sqlDurationMs': round(self.sql_duration * 1000, 3),
+            'errors': len(self.result.errors or ()) if self.result is not None else 0,
+            'variables': redact(self.variables or {}),
+            'statements': self.statements(),
+        }
+        logger.warning(
+            'Slow GraphQL operation %s (%s): %.1fms, %d SQL queries in %.1fms',
+            name or '<anonymous>', record['documentHash'][:12], record['durationMs'],
+            record['sqlCount'], record['sqlDurationMs'],
+            extra={'graphql_slow_operation': record},
+        )
+        return record
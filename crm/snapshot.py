@@ -0,0 +1,32 @@
+from functools import lru_cache
+from pathlib import Path
+
+from graphql import GraphQLError, build_schema, parse, print_schema, validate
+
+# The SDL of the schema the jobs run against, written by
+# `manage.py export_schema_snapshot`.
+SNAPSHOT_PATH = Path(__file__).resolve().parent / 'schema.graphql'
+
+
+def schema_sdl(schema):
+    """Return the SDL of a graphene ``schema``, as stored in the snapshot."""
+    return print_schema(schema.graphql_schema) + '\n'
+
+
+@lru_cache(maxsize=None)
+def load_schema_snapshot(path=SNAPSHOT_PATH):
+    """Build a GraphQLSchema from the SDL snapshot instead of introspecting a server.
+
+    The result can be passed as ``schema=`` to a gql ``Client`` or used to
+    validate documents locally.
+    """
+    return build_schema(Path(path).read_text())
+
+
+def validate_against_snapshot(query, path=SNAPSHOT_PATH):
+    """Return the errors of ``query`` against the snapshot; empty if it is valid."""
+    try:
+        document = parse(query)
+    except GraphQLError as e:
+        return [e]
+    return validate(load_schema_snapshot(path), document)
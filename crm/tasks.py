@@ -1,55 +1,26 @@
 from celery import shared_task
-import requests
-from datetime import datetime
+from decimal import Decimal
+
+from crm.documents import CRM_REPORT_QUERY
+from crm.executor import execute_operation
+from crm.joblog import JobLog
 
 @shared_task
 def generate_crm_report():
-    # GraphQL query to get CRM statistics
-    query = """
-    query {
-        customers {
-            totalCount
-        }
-        orders {
-            totalCount
-            edges {
-                node {
-                    totalAmount
-                }
-            }
-        }
-    }
-    """
-    
-    try:
-        response = requests.post(
-            'http://localhost:8000/graphql',
-            json={'query': query},
-            headers={'Content-Type': 'application/json'}
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            customer_count = data['data']['customers']['totalCount']
-            order_count = data['data']['orders']['totalCount']
-            
-            # Calculate total revenue
-            revenue = sum(
-                float(order['node']['totalAmount']) 
-                for order in data['data']['orders']['edges']
-            )
+    with JobLog('crm_report') as log:
+        try:
+            # Totals are summed by the database; revenue arrives as an exact decimal string
+            data = execute_operation(CRM_REPORT_QUERY)
+            report = data['crmReport']
             
             # Log the report
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            with open('/tmp/crm_report_log.txt', 'a') as f:
-                f.write(f"{timestamp} - Report: {customer_count} customers, {order_count} orders, {revenue:.2f} revenue\n")
-                
-        else:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            with open('/tmp/crm_report_log.txt', 'a') as f:
-                f.write(f"{timestamp} - Error: Failed to generate report (HTTP {response.status_code})\n")
+            log.write(
+                'report',
+                customers=data['totalCustomers'],
+                customers_with_orders=report['customerCount'],
+                orders=report['orderCount'],
+                revenue=Decimal(report['revenue']),
+            )
                 
-    except Exception as e:
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with open('/tmp/crm_report_log.txt', 'a') as f:
-            f.write(f"{timestamp} - Exception: {str(e)}\n")
+        except Exception as e:
+            log.write('error', error=str(e))
@@ -0,0 +1,50 @@
+import json
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from crm.models import Customer, Order, Product
+
+BULK_CREATE_ORDERS = '''
+mutation BulkCreateOrders($inputs: [OrderInput]!) {
+  bulkCreateOrders(inputs: $inputs) {
+    orders { id totalAmount customer { email } products { name } }
+    errors
+    successCount
+    errorCount
+  }
+}
+'''
+
+
+@override_settings(ROOT_URLCONF='alx_backend_graphql_crm.urls', CRM_SETTINGS={})
+class BulkCreateOrdersTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Ada', email='ada@example.com')
+        self.pen = Product.objects.create(name='Pen', price=Decimal('1.50'))
+        self.pad = Product.objects.create(name='Pad', price=Decimal('4.00'))
+
+    def post(self, inputs):
+        response = self.client.post(
+            '/graphql',
+            json.dumps({'query': BULK_CREATE_ORDERS, 'variables': {'inputs': inputs}}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertNotIn('errors', payload)
+        return payload['data']['bulkCreateOrders']
+
+    def test_creates_the_valid_orders_and_reports_the_rest(self):
+        result = self.post([
+            {'customerId': str(self.customer.pk), 'productIds': [str(self.pen.pk), str(self.pad.pk)]},
+            {'customerId': '0', 'productIds': [str(self.pen.pk)]},
+        ])
+        self.assertEqual((result['successCount'], result['errorCount']), (1, 1))
+        self.assertTrue(result['errors'][0].startswith('Order 2:'))
+        [order] = result['orders']
+        self.assertEqual(Decimal(order['totalAmount']), Decimal('5.50'))
+        self.assertEqual(order['customer'], {'email': 'ada@example.com'})
+        self.assertEqual(sorted(product['name'] for product in order['products']), ['Pad', 'Pen'])
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Order.objects.get().products.count(), 2)
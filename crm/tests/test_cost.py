@@ -0,0 +1,49 @@
+import json
+
+from django.test import TestCase, override_settings
+
+from crm.document_cache import document_cache
+
+PAGE = 'query Page($first: Int) { customers(first: $first) { edges { node { id } } } }'
+NESTED = '{ orders(first: 2) { edges { node { customer { name } products { name } } } } }'
+
+
+@override_settings(ROOT_URLCONF='alx_backend_graphql_crm.urls')
+class QueryCostTests(TestCase):
+    def setUp(self):
+        document_cache.clear()
+
+    def post(self, query, variables=None):
+        response = self.client.post(
+            '/graphql', json.dumps({'query': query, 'variables': variables}), content_type='application/json',
+        )
+        return response.status_code, response.json()
+
+    @override_settings(CRM_SETTINGS={'GRAPHQL_MAX_QUERY_COST': 50})
+    def test_accepted_operations_report_their_cost(self):
+        status, payload = self.post(PAGE, {'first': 5})
+        self.assertEqual(status, 200)
+        self.assertEqual(payload['data'], {'customers': {'edges': []}})
+        self.assertEqual(payload['extensions']['cost'], {
+            'requestedQueryCost': 11, 'maximumQueryCost': 50, 'depth': 4, 'maximumDepth': 10,
+        })
+
+    @override_settings(CRM_SETTINGS={'GRAPHQL_MAX_QUERY_COST': 50})
+    def test_over_budget_operations_are_rejected_before_execution(self):
+        with self.assertNumQueries(0):
+            status, payload = self.post(PAGE, {'first': 30})
+        self.assertEqual(status, 400)
+        self.assertNotIn('data', payload)
+        [error] = payload['errors']
+        self.assertEqual(error['extensions']['code'], 'QUERY_TOO_EXPENSIVE')
+        self.assertEqual(error['extensions']['cost'], 61)
+        self.assertEqual(payload['extensions']['cost']['requestedQueryCost'], 61)
+
+    @override_settings(CRM_SETTINGS={'GRAPHQL_MAX_QUERY_DEPTH': 4})
+    def test_too_deep_operations_are_rejected_before_execution(self):
+        with self.assertNumQueries(0):
+            status, payload = self.post(NESTED)
+        self.assertEqual(status, 400)
+        [error] = payload['errors']
+        self.assertEqual(error['extensions']['code'], 'QUERY_TOO_DEEP')
+        self.assertEqual(payload['extensions']['cost']['depth'], 5)
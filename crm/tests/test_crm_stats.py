@@ -0,0 +1,82 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from crm.models import CrmStats, Customer, Order
+
+
+class CrmStatsTests(TestCase):
+    def setUp(self):
+        self.ada = Customer.objects.create(name='Ada', email='ada@example.com')
+
+    def assertStats(self, customers, orders, revenue):
+        stats = CrmStats.objects.get(pk=1)
+        self.assertEqual(
+            (stats.customer_count, stats.order_count, stats.total_revenue),
+            (customers, orders, Decimal(revenue)),
+        )
+        self.assertEqual(CrmStats.measure(), {
+            'customer_count': customers, 'order_count': orders, 'total_revenue': Decimal(revenue),
+        })
+
+    def test_instance_save_and_delete(self):
+        self.assertStats(1, 0, '0')
+        order = Order.objects.create(customer=self.ada, total_amount=Decimal('10.00'))
+        self.assertStats(1, 1, '10.00')
+
+        order = Order.objects.get(pk=order.pk)
+        order.total_amount = Decimal('12.50')
+        order.save()
+        self.assertStats(1, 1, '12.50')
+
+        order.delete()
+        self.assertStats(1, 0, '0')
+
+    def test_bulk_create(self):
+        Customer.objects.bulk_create(
+            Customer(name=f'Bulk {number}', email=f'bulk-{number}@example.com') for number in range(3)
+        )
+        Order.objects.bulk_create([
+            Order(customer=self.ada, total_amount=Decimal('1.25')),
+            Order(customer=self.ada, total_amount=Decimal('2.75')),
+        ])
+        self.assertStats(4, 2, '4.00')
+
+    def test_queryset_update_and_delete(self):
+        for amount in ('1.00', '2.00', '3.00'):
+            Order.objects.create(customer=self.ada, total_amount=Decimal(amount))
+
+        Order.objects.filter(total_amount__lt=3).update(total_amount=Decimal('5.00'))
+        self.assertStats(1, 3, '13.00')
+
+        Order.objects.filter(total_amount=5).delete()
+        self.assertStats(1, 1, '3.00')
+
+    def test_cascade_delete_from_customer_to_orders(self):
+        grace = Customer.objects.create(name='Grace', email='grace@example.com')
+        Order.objects.create(customer=self.ada, total_amount=Decimal('4.00'))
+        Order.objects.create(customer=grace, total_amount=Decimal('6.00'))
+        Order.objects.create(customer=grace, total_amount=Decimal('7.00'))
+
+        grace.delete()
+        self.assertStats(1, 1, '4.00')
+
+        Customer.objects.all().delete()
+        self.assertStats(0, 0, '0')
+
+    def test_rebuild_check_reports_drift(self):
+        Order.objects.create(customer=self.ada, total_amount=Decimal('10.00'))
+        call_command('rebuild_crm_stats', '--check', stdout=StringIO())
+
+        # A raw write behind the model's back.
+        CrmStats.objects.filter(pk=1).update(order_count=5)
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, 'drifted'):
+            call_command('rebuild_crm_stats', '--check', stdout=out)
+        self.assertIn('order_count: stored 5, actual 1', out.getvalue())
+
+        call_command('rebuild_crm_stats', stdout=StringIO())
+        call_command('rebuild_crm_stats', '--check', stdout=StringIO())
+        self.assertStats(1, 1, '10.00')
@@ -0,0 +1,47 @@
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from alx_backend_graphql_crm.schema import schema
+from crm import cost
+from crm.document_cache import DocumentCache, document_cache
+
+PAGE = 'query Page($first: Int) { customers(first: $first) { edges { node { id } } } }'
+# Every unknown field is a separate validation error.
+INVALID = '{ %s }' % ' '.join(f'missing{number}' for number in range(50))
+
+
+class ValidationErrorCapTests(SimpleTestCase):
+    @override_settings(CRM_SETTINGS={'GRAPHQL_MAX_VALIDATION_ERRORS': 5})
+    def test_validation_stops_at_the_configured_cap(self):
+        errors = DocumentCache(8).get(schema.graphql_schema, INVALID).errors
+        # graphql-core appends one "Too many validation errors" error past the cap.
+        self.assertEqual(len(errors), 6)
+        self.assertIn('Too many validation errors', errors[-1].message)
+
+
+@override_settings(ROOT_URLCONF='alx_backend_graphql_crm.urls', CRM_SETTINGS={})
+class CachedCostTests(TestCase):
+    def setUp(self):
+        document_cache.clear()
+
+    def cost(self, first):
+        response = self.client.post(
+            '/graphql',
+            json.dumps({'query': PAGE, 'variables': {'first': first}}),
+            content_type='application/json',
+        )
+        return response.json()['extensions']['cost']['requestedQueryCost']
+
+    def test_cache_hits_skip_the_cost_walk(self):
+        with mock.patch.object(cost, 'validate', wraps=cost.validate) as walk:
+            self.assertEqual(self.cost(5), 11)
+            self.assertEqual(self.cost(5), 11)
+            self.assertEqual(walk.call_count, 1)
+
+            # A different page size is costed again, then remembered too.
+            self.assertEqual(self.cost(20), 41)
+            self.assertEqual(self.cost(20), 41)
+            self.assertEqual(self.cost(5), 11)
+            self.assertEqual(walk.call_count, 2)
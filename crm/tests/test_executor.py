@@ -0,0 +1,36 @@
+import os
+import tempfile
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from crm.cron import update_low_stock
+from crm.documents import UPDATE_LOW_STOCK_MUTATION
+from crm.executor import execute_operation
+from crm.joblog import read_job_log
+from crm.models import Product
+
+
+# The defaults: no GRAPHQL_JOB_ENDPOINT, so operations run in-process
+# against the GRAPHENE SCHEMA setting.
+@override_settings(CRM_SETTINGS={})
+class UpdateLowStockJobTests(TestCase):
+    def setUp(self):
+        Product.objects.create(name='Low', price=Decimal('1.00'), stock=3)
+        Product.objects.create(name='Stocked', price=Decimal('1.00'), stock=50)
+
+    def test_mutation_runs_against_the_served_schema(self):
+        result = execute_operation(UPDATE_LOW_STOCK_MUTATION)['updateLowStockProducts']
+        self.assertTrue(result['success'])
+        self.assertEqual(result['updatedProducts'], ['Low: 3 -> 13'])
+        self.assertEqual(Product.objects.get(name='Low').stock, 13)
+
+    def test_cron_job_logs_the_update(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'low_stock_updates.log')
+            with override_settings(CRM_SETTINGS={'LOW_STOCK_UPDATES_LOG_FILE': path}):
+                update_low_stock()
+            records = list(read_job_log(path))
+        self.assertEqual([record['event'] for record in records], ['low_stock_update'])
+        self.assertTrue(records[0]['success'])
+        self.assertEqual(records[0]['updated_products'], ['Low: 3 -> 13'])
@@ -0,0 +1,112 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from crm.models import Customer, Order
+from crm.pagination import encode_cursor
+
+ORDERS = '''
+query Orders($orderBy: OrderOrderBy, $first: Int, $after: String, $last: Int, $before: String) {
+  orders(orderBy: $orderBy, first: $first, after: $after, last: $last, before: $before) {
+    edges { cursor node { id } }
+    pageInfo { hasNextPage hasPreviousPage startCursor endCursor }
+  }
+}
+'''
+
+# Three orders each on January 1st and 3rd, so pages of two split the ties.
+DAYS = [3, 1, 3, 2, 1, 3, 1]
+
+
+@override_settings(ROOT_URLCONF='alx_backend_graphql_crm.urls', CRM_SETTINGS={'GRAPHQL_MAX_PAGE_SIZE': 5})
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        customer = Customer.objects.create(name='Ada', email='ada@example.com')
+        cls.dates = {}
+        for day in DAYS:
+            order = Order.objects.create(customer=customer, total_amount=Decimal('1.00'))
+            # order_date is auto_now_add, so it is set afterwards.
+            date = datetime(2024, 1, day, tzinfo=timezone.utc)
+            Order.objects.filter(pk=order.pk).update(order_date=date)
+            cls.dates[order.pk] = date
+
+    def expected(self, order_by):
+        if order_by.startswith('ID'):
+            pks = sorted(self.dates)
+        else:
+            pks = sorted(self.dates, key=lambda pk: (self.dates[pk], pk))
+        return pks[::-1] if order_by.endswith('DESC') else pks
+
+    def orders(self, **variables):
+        response = self.client.post(
+            '/graphql', json.dumps({'query': ORDERS, 'variables': variables}), content_type='application/json',
+        )
+        return response.json()
+
+    def page(self, **variables):
+        payload = self.orders(**variables)
+        self.assertNotIn('errors', payload)
+        orders = payload['data']['orders']
+        return [int(edge['node']['id']) for edge in orders['edges']], orders['pageInfo']
+
+    def test_forward_walk(self):
+        for order_by in ('ID_ASC', 'ID_DESC', 'ORDER_DATE_ASC', 'ORDER_DATE_DESC'):
+            with self.subTest(order_by=order_by):
+                seen, after, pages = [], None, []
+                while True:
+                    pks, info = self.page(orderBy=order_by, first=2, after=after)
+                    seen += pks
+                    pages.append((info['hasPreviousPage'], info['hasNextPage']))
+                    if not info['hasNextPage']:
+                        break
+                    after = info['endCursor']
+                self.assertEqual(seen, self.expected(order_by))
+                self.assertEqual(pages, [(False, True), (True, True), (True, True), (True, False)])
+
+    def test_backward_walk(self):
+        for order_by in ('ID_ASC', 'ID_DESC', 'ORDER_DATE_ASC', 'ORDER_DATE_DESC'):
+            with self.subTest(order_by=order_by):
+                seen, before, pages = [], None, []
+                while True:
+                    pks, info = self.page(orderBy=order_by, last=2, before=before)
+                    seen = pks + seen
+                    pages.append((info['hasPreviousPage'], info['hasNextPage']))
+                    if not info['hasPreviousPage']:
+                        break
+                    before = info['startCursor']
+                self.assertEqual(seen, self.expected(order_by))
+                self.assertEqual(pages, [(True, False), (True, True), (True, True), (False, True)])
+
+    def test_cursor_inside_a_run_of_ties(self):
+        expected = self.expected('ORDER_DATE_ASC')
+        # The second of the three orders placed on January 1st.
+        middle = encode_cursor(expected[1], self.dates[expected[1]])
+        pks, _ = self.page(orderBy='ORDER_DATE_ASC', first=3, after=middle)
+        self.assertEqual(pks, expected[2:5])
+        pks, _ = self.page(orderBy='ORDER_DATE_ASC', last=3, before=middle)
+        self.assertEqual(pks, expected[:1])
+
+    def test_page_size_above_the_maximum(self):
+        for argument in ('first', 'last'):
+            with self.subTest(argument=argument):
+                payload = self.orders(**{argument: 6})
+                self.assertEqual(payload['errors'][0]['message'], f'`{argument}` must be between 0 and 5.')
+        pks, _ = self.page(first=5)
+        self.assertEqual(len(pks), 5)
+
+    def test_malformed_cursors(self):
+        pk = min(self.dates)
+        date_cursor = encode_cursor(pk, self.dates[pk])
+        for order_by, cursor in [
+            ('ID_ASC', 'not base64!'),
+            ('ID_ASC', encode_cursor('1; DROP TABLE')),
+            ('ID_ASC', date_cursor),
+            ('ORDER_DATE_ASC', encode_cursor(pk)),
+            ('ORDER_DATE_ASC', encode_cursor(pk, 'not a date')),
+        ]:
+            with self.subTest(order_by=order_by, cursor=cursor):
+                payload = self.orders(orderBy=order_by, first=2, after=cursor)
+                self.assertEqual(payload['errors'][0]['message'], f'Invalid cursor: {cursor!r}')
@@ -0,0 +1,47 @@
+import json
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from crm.models import Customer, Order, Product
+
+ORDERS = '{ orders(first: 10) { edges { node { id customer { email } products { name } } } } }'
+CUSTOMERS = '{ customers(first: 10) { edges { node { name orderSet { totalAmount products { name } } } } } }'
+
+
+@override_settings(ROOT_URLCONF='alx_backend_graphql_crm.urls', CRM_SETTINGS={})
+class NestedQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(3):
+            customer = Customer.objects.create(name=f'Customer {number}', email=f'c{number}@example.com')
+            product = Product.objects.create(name=f'Product {number}', price=Decimal('1.00'))
+            for _ in range(2):
+                Order.objects.create(customer=customer, total_amount=Decimal('1.00')).products.add(product)
+
+    def execute(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/graphql', json.dumps({'query': query}), content_type='application/json')
+        self.assertNotIn('errors', response.json())
+        return [captured['sql'] for captured in queries.captured_queries]
+
+    def test_orders_with_customer_and_products(self):
+        with self.assertNumQueries(2):
+            orders, products = self.execute(ORDERS)
+        # The customer comes from a JOIN that selects only the requested email.
+        self.assertIn('INNER JOIN "crm_customer"', orders)
+        self.assertIn('"crm_customer"."email"', orders)
+        self.assertNotIn('"crm_customer"."name"', orders)
+        self.assertNotIn('"crm_order"."total_amount"', orders)
+        self.assertIn('"crm_product"."name"', products)
+        self.assertNotIn('"crm_product"."price"', products)
+
+    def test_customers_with_orders_and_products(self):
+        # One query per nesting level, however many rows each level has.
+        with self.assertNumQueries(3):
+            self.execute(CUSTOMERS)
+        Customer.objects.create(name='Customer 3', email='c3@example.com')
+        with self.assertNumQueries(3):
+            self.execute(CUSTOMERS)
@@ -0,0 +1,12 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class HotQueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        # Raises CommandError, failing the test, when a plan scans a whole table.
+        out = StringIO()
+        call_command('check_query_plans', customers=200, products=100, orders=2000, stdout=out)
+        self.assertIn('Every hot query uses an index.', out.getvalue())
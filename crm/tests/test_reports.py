@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.test import TestCase
+
+from crm.models import Customer, Order
+from crm.reports import crm_report
+
+
+class CrmReportTests(TestCase):
+    def setUp(self):
+        ada, bob, cy = (
+            Customer.objects.create(name=name, email=f'{name.lower()}@example.com')
+            for name in ('Ada', 'Bob', 'Cy')
+        )
+        for customer, day, total in ((ada, 1, '10.00'), (ada, 2, '5.00'), (bob, 2, '2.50'), (cy, 20, '1.00')):
+            order = Order.objects.create(customer=customer, total_amount=Decimal(total))
+            # order_date is auto_now_add, so it is moved afterwards.
+            Order.objects.filter(pk=order.pk).update(order_date=datetime(2026, 1, day, tzinfo=timezone.utc))
+
+    def test_customer_count_is_limited_to_the_window(self):
+        report = crm_report(datetime(2026, 1, 1, tzinfo=timezone.utc), datetime(2026, 1, 10, tzinfo=timezone.utc))
+        self.assertEqual(report['customer_count'], 2)
+        self.assertEqual(report['order_count'], 3)
+        self.assertEqual(report['revenue'], Decimal('17.50'))
+
+    def test_unbounded_report_counts_every_ordering_customer(self):
+        Customer.objects.create(name='Dee', email='dee@example.com')
+        self.assertEqual(crm_report()['customer_count'], 3)
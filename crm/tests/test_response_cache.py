@@ -0,0 +1,46 @@
+import json
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from crm.models import Customer, Order, OrderProduct, Product
+
+ORDER_PRODUCTS = '{ orders(first: 10) { edges { node { id products { name } } } } }'
+
+
+@override_settings(
+    ROOT_URLCONF='alx_backend_graphql_crm.urls',
+    CRM_SETTINGS={'GRAPHQL_RESPONSE_CACHE_ENABLED': True},
+)
+class OrderProductInvalidationTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        customer = Customer.objects.create(name='Ada', email='ada@example.com')
+        self.pen = Product.objects.create(name='Pen', price=Decimal('1.50'))
+        self.order = Order.objects.create(customer=customer, total_amount=Decimal('1.50'))
+        self.order.products.add(self.pen)
+
+    def products(self):
+        response = self.client.post(
+            '/graphql', json.dumps({'query': ORDER_PRODUCTS}), content_type='application/json',
+        )
+        payload = response.json()
+        [edge] = payload['data']['orders']['edges']
+        return [product['name'] for product in edge['node']['products']], payload['extensions']['responseCache']
+
+    def test_direct_writes_to_order_lines_expire_the_cache(self):
+        self.assertEqual(self.products(), (['Pen'], 'MISS'))
+        self.assertEqual(self.products(), (['Pen'], 'HIT'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderProduct.objects.filter(order=self.order).delete()
+        self.assertEqual(self.products(), ([], 'MISS'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderProduct.objects.bulk_create([OrderProduct(order=self.order, product=self.pen)])
+        self.assertEqual(self.products(), (['Pen'], 'MISS'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderProduct.objects.get(order=self.order).delete()
+        self.assertEqual(self.products(), ([], 'MISS'))
@@ -0,0 +1,12 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+
+class SchemaSnapshotTests(SimpleTestCase):
+    def test_snapshot_matches_the_served_schema(self):
+        call_command('export_schema_snapshot', check=True, stdout=StringIO())
+
+    def test_job_documents_match_the_snapshot(self):
+        call_command('check_graphql_documents', stdout=StringIO())
@@ -0,0 +1,33 @@
+from django.test import SimpleTestCase, TestCase
+
+from crm.models import Customer
+from crm.search import CONTACT, NAME, NAME_PREFIX, RegexBackend, SearchBackend, SQLiteFTSBackend
+
+
+class SearchBackendTests(SimpleTestCase):
+    def test_backends_must_implement_tier(self):
+        with self.assertRaises(TypeError):
+            SearchBackend()
+
+        class Partial(SearchBackend):
+            pass
+
+        with self.assertRaises(TypeError):
+            Partial()
+
+
+class RankingTests(TestCase):
+    def setUp(self):
+        self.smith = Customer.objects.create(name='Smith Jones', email='sj@example.com').pk
+        self.john = Customer.objects.create(name='John Smith', email='john@example.com').pk
+        self.mail = Customer.objects.create(name='Ada Lovelace', email='smithy@example.com').pk
+
+    def test_backends_rank_names_before_contacts(self):
+        for backend in (RegexBackend(), SQLiteFTSBackend()):
+            backend.install()
+            with self.subTest(backend=type(backend).__name__):
+                self.assertEqual(
+                    backend.search('smith', 10),
+                    [(NAME_PREFIX, self.smith), (NAME, self.john), (CONTACT, self.mail)],
+                )
+                self.assertEqual(backend.search('smith', 10, after=(NAME, self.john)), [(CONTACT, self.mail)])
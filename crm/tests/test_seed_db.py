@@ -0,0 +1,34 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase
+
+import seed_db
+from crm.models import CrmStats, Customer, Order
+
+
+class SeedAppendTests(TestCase):
+    def run_seed(self, *args):
+        argv = ['seed_db.py', '--customers', '30', '--products', '5', '--orders', '40',
+                '--seed', '7', '--workers', '1', *args]
+        with mock.patch('sys.argv', argv), redirect_stdout(StringIO()):
+            seed_db.main()
+
+    def test_appending_with_the_same_seed_adds_new_customers(self):
+        self.run_seed()
+        first_emails = set(Customer.objects.values_list('email', flat=True))
+        self.run_seed('--append')
+        self.run_seed('--append')
+
+        emails = list(Customer.objects.values_list('email', flat=True))
+        self.assertEqual(len(emails), 90)
+        self.assertEqual(len(set(emails)), 90)
+        self.assertTrue(first_emails < set(emails))
+        self.assertEqual(Order.objects.count(), 120)
+        self.assertEqual(CrmStats.current().customer_count, 90)
+
+    def test_without_append_the_rows_are_replaced(self):
+        self.run_seed()
+        self.run_seed()
+        self.assertEqual(Customer.objects.count(), 30)
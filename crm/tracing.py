@@ -0,0 +1,161 @@
+import logging
+import time
+from contextvars import ContextVar
+from inspect import isawaitable
+
+from django.conf import settings
+from django.db import connection
+
+from crm.conf import crm_setting
+
+logger = logging.getLogger(__name__)
+
+# The resolver whose code is running, so SQL can be charged to its path.
+_current = ContextVar('crm_trace_resolver', default=None)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+class ResolverTiming:
+    __slots__ = ('path', 'field', 'duration', 'sql_count', 'sql_duration')
+
+    def __init__(self, path, field):
+        self.path = path
+        self.field = field
+        self.duration = 0.0
+        self.sql_count = 0
+        self.sql_duration = 0.0
+
+
+class Trace:
+    """Resolver and SQL timings of one GraphQL operation.
+
+    TracingMiddleware records how long each field's resolver ran; the
+    connection's execute wrapper charges every SQL statement to the
+    resolver running at the time, or to the operation itself when none is.
+    """
+
+    def __init__(self, operation_name=None):
+        self.operation_name = operation_name
+        self.resolvers = []
+        self.sql_count = 0
+        self.sql_duration = 0.0
+        self.start = time.perf_counter()
+        self.duration = None
+
+    def enter(self, path, field):
+        timing = ResolverTiming(path, field)
+        self.resolvers.append(timing)
+        return timing
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.sql_count += 1
+            self.sql_duration += elapsed
+            timing = _current.get()
+            if timing is not None:
+                timing.sql_count += 1
+                timing.sql_duration += elapsed
+
+    def install(self):
+        """Record the SQL run on this thread's connection until uninstall()."""
+        connection.execute_wrappers.append(self)
+
+    def uninstall(self):
+        connection.execute_wrappers.remove(self)
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.start
+
+    def summary(self):
+        """The trace as a JSON-serializable dict, for ``extensions.tracing`` and the log."""
+        fields = {}
+        for timing in self.resolvers:
+            field = fields.setdefault(timing.field, {
+                'field': timing.field, 'calls': 0, 'durationMs': 0.0, 'sqlCount': 0, 'sqlDurationMs': 0.0,
+            })
+            field['calls'] += 1
+            field['durationMs'] += timing.duration
+            field['sqlCount'] += timing.sql_count
+            field['sqlDurationMs'] += timing.sql_duration
+        for field in fields.values():
+            field['durationMs'] = _ms(field['durationMs'])
+            field['sqlDurationMs'] = _ms(field['sqlDurationMs'])
+
+        return {
+            'operationName': self.operation_name,
+            'durationMs': _ms(self.duration if self.duration is not None else time.perf_counter() - self.start),
+            'sqlCount': self.sql_count,
+            'sqlDurationMs': _ms(self.sql_duration),
+            # Slowest fields first: where an N+1 shows up as many calls with SQL each.
+            'fields': sorted(fields.values(), key=lambda field: field['durationMs'], reverse=True),
+            'resolvers': [
+                {
+                    'path': timing.path,
+                    'durationMs': _ms(timing.duration),
+                    'sqlCount': timing.sql_count,
+                    'sqlDurationMs': _ms(timing.sql_duration),
+                }
+                for timing in self.resolvers
+            ],
+        }
+
+    def log(self, summary=None):
+        summary = summary or self.summary()
+        logger.info(
+            'GraphQL operation %s took %.1fms, %d SQL queries in %.1fms',
+            self.operation_name or '<anonymous>', summary['durationMs'],
+            summary['sqlCount'], summary['sqlDurationMs'],
+            extra={'graphql_trace': summary},
+        )
+
+
+class TracingMiddleware:
+    """Graphene middleware that times every resolver into a Trace."""
+
+    def __init__(self, trace):
+        self.trace = trace
+
+    def resolve(self, next, root, info, **args):
+        timing = self.trace.enter(
+            '.'.join(str(key) for key in info.path.as_list()),
+            f'{info.parent_type.name}.{info.field_name}',
+        )
+        token = _current.set(timing)
+        start = time.perf_counter()
+        try:
+            result = next(root, info, **args)
+        finally:
+            timing.duration += time.perf_counter() - start
+            _current.reset(token)
+        if isawaitable(result):
+            return self._resolve_async(result, timing)
+        return result
+
+    @staticmethod
+    async def _resolve_async(result, timing):
+        token = _current.set(timing)
+        start = time.perf_counter()
+        try:
+            return await result
+        finally:
+            timing.duration += time.perf_counter() - start
+            _current.reset(token)
+
+
+def trace_requested(request):
+    """Whether ``request`` asked for ``extensions.tracing`` with the debug header.
+
+    The header is honoured in DEBUG and for staff users only, since the
+    trace reveals how the schema is resolved.
+    """
+    if not request.headers.get(crm_setting('GRAPHQL_TRACING_HEADER')):
+        return False
+    user = getattr(request, 'user', None)
+    return settings.DEBUG or bool(user is not None and user.is_staff)
@@ -0,0 +1,449 @@
+import inspect
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
+from django.views.decorators.http import require_GET
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast
+from graphql.execution.middleware import MiddlewareManager
+
+from crm.conf import crm_setting
+from crm.cost import analyze_cost
+from crm.document_cache import document_cache, persisted_queries
+from crm.loaders import Loaders
+from crm.metrics import OperationMetrics, record_cache_lookup, render
+from crm.response_cache import response_cache
+from crm.slow_log import SlowLog
+from crm.tracing import Trace, TracingMiddleware, trace_requested
+
+
+class CRMGraphQLView(GraphQLView):
+    """GraphQLView that reuses parsed and validated documents.
+
+    Query texts are looked up in the process-wide document cache instead of
+    being parsed and validated on every request, and clients may send a
+    persisted query hash in place of the text. When
+    GRAPHQL_RESPONSE_CACHE_ENABLED is set, query results are also served
+    from the response cache; ``extensions.responseCache`` says HIT or MISS.
+    Mutations are never cached.
+
+    Operations over the cost or depth budget are rejected before execution;
+    accepted ones report their cost in ``extensions.cost``. Operations over
+    the slow-log budget are logged with their slowest SQL (crm/slow_log.py).
+
+    A POST whose JSON body is an array runs each operation in turn and
+    returns an array of results, up to GRAPHQL_MAX_BATCH_SIZE operations.
+    The operations share the request's loaders, which a mutation resets.
+
+    With GRAPHQL_TRACING_ENABLED, or a GRAPHQL_TRACING_HEADER request from
+    DEBUG or a staff user, each operation is traced: resolver times and SQL
+    per field path go to the ``crm.tracing`` logger, and to
+    ``extensions.tracing`` when the header was sent.
+    """
+
+    document_cache = document_cache
+    persisted_queries = persisted_queries
+    response_cache = response_cache
+
+    def parse_body(self, request):
+        if (
+            self.get_content_type(request) == "application/json"
+            and request.body.lstrip().startswith(b"[")
+        ):
+            self.batch = True
+        data = super().parse_body(request)
+        max_batch_size = crm_setting("GRAPHQL_MAX_BATCH_SIZE")
+        if self.batch and len(data) > max_batch_size:
+            raise HttpError(
+                HttpResponseBadRequest(
+                    f"Batch of {len(data)} operations exceeds the maximum of {max_batch_size}."
+                )
+            )
+        return data
+
+    @classmethod
+    def can_display_graphiql(cls, request, data):
+        return not isinstance(data, list) and super().can_display_graphiql(request, data)
+
+    def get_response(self, request, data, show_graphiql=False):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        execution_result = self.execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        return self.format_response(request, execution_result, id, show_graphiql)
+
+    def format_response(self, request, execution_result, id=None, show_graphiql=False):
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        status_code = 200
+        if execution_result:
+            response = {}
+
+            if execution_result.errors:
+                set_rollback()
+                response["errors"] = [
+                    self.format_error(e) for e in execution_result.errors
+                ]
+
+            if execution_result.errors and any(
+                not getattr(e, "path", None) for e in execution_result.errors
+            ):
+                status_code = 400
+            else:
+                response["data"] = execution_result.data
+
+            if execution_result.extensions:
+                response["extensions"] = execution_result.extensions
+
+            if self.batch:
+                response["id"] = id
+                response["status"] = status_code
+
+            result = self.json_encode(request, response, pretty=show_graphiql)
+        else:
+            result = None
+
+        return result, status_code
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        slow_log = SlowLog(variables)
+        with OperationMetrics() as metrics, slow_log:
+            document, operation_ast, cost, result = self.prepare_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+            metrics.operation_ast = slow_log.operation_ast = operation_ast
+            slow_log.document = document
+            if document is not None:
+                result = self.execute_prepared(
+                    request, document, operation_ast, cost, variables, operation_name
+                )
+            metrics.result = slow_log.result = result
+        if slow_log.exceeded:
+            slow_log.emit()
+        return result
+
+    def execute_prepared(self, request, document, operation_ast, cost, variables, operation_name):
+        trace = self.start_trace(request, operation_name)
+        if trace is not None:
+            trace.install()
+        try:
+            if self.use_response_cache(operation_ast):
+                result = self.execute_cached(request, document, operation_ast, variables, operation_name)
+            else:
+                result = self.execute_document(request, document, operation_ast, variables, operation_name)
+        finally:
+            if trace is not None:
+                trace.uninstall()
+        result.extensions = {**(result.extensions or {}), "cost": cost}
+        if trace is not None:
+            self.finish_trace(request, trace, result)
+        return result
+
+    def start_trace(self, request, operation_name):
+        """A Trace for the operation about to run, or None when it isn't traced."""
+        if not (crm_setting("GRAPHQL_TRACING_ENABLED") or trace_requested(request)):
+            return None
+        request.graphql_trace = Trace(operation_name)
+        return request.graphql_trace
+
+    def finish_trace(self, request, trace, result):
+        request.graphql_trace = None
+        trace.finish()
+        summary = trace.summary()
+        trace.log(summary)
+        if trace_requested(request):
+            result.extensions = {**(result.extensions or {}), "tracing": summary}
+
+    def get_middleware(self, request):
+        middleware = super().get_middleware(request)
+        trace = getattr(request, "graphql_trace", None)
+        if trace is None:
+            return middleware
+        if isinstance(middleware, MiddlewareManager):
+            middleware = middleware.middlewares
+        # Last is outermost, so resolver times include the other middleware.
+        return [*(middleware or []), TracingMiddleware(trace)]
+
+    def prepare_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        """Resolve, parse, validate and cost the request.
+
+        Returns ``(document, operation_ast, cost, None)`` for an operation
+        that may run, or ``(None, None, None, result)`` when the request ends
+        before execution.
+        """
+        try:
+            query = self.persisted_queries.resolve(query, self.get_extensions(request, data))
+        except GraphQLError as e:
+            return None, None, None, ExecutionResult(errors=[e])
+
+        if not query:
+            if show_graphiql:
+                return None, None, None, None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        try:
+            document, validation_errors, costs = self.document_cache.get(
+                self.schema.graphql_schema, query, self.validation_rules
+            )
+        except GraphQLError as e:
+            return None, None, None, ExecutionResult(errors=[e])
+
+        operation_ast = get_operation_ast(document, operation_name)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None, None, None, None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        if validation_errors:
+            return None, None, None, ExecutionResult(data=None, errors=validation_errors)
+
+        cost, cost_errors = analyze_cost(
+            self.schema.graphql_schema, document, variables, operation_name, costs
+        )
+        if cost_errors:
+            return None, None, None, ExecutionResult(
+                data=None, errors=cost_errors, extensions={"cost": cost}
+            )
+        return document, operation_ast, cost, None
+
+    @staticmethod
+    def use_response_cache(operation_ast):
+        return (
+            crm_setting("GRAPHQL_RESPONSE_CACHE_ENABLED")
+            and operation_ast is not None
+            and operation_ast.operation == OperationType.QUERY
+        )
+
+    def execute_cached(self, request, document, operation_ast, variables, operation_name):
+        key = self.response_cache.key(
+            self.schema.graphql_schema, document, variables, operation_name
+        )
+        data = self.response_cache.get(key)
+        record_cache_lookup("response", data is not None)
+        if data is not None:
+            return ExecutionResult(data=data, extensions={"responseCache": "HIT"})
+
+        result = self.execute_document(request, document, operation_ast, variables, operation_name)
+        if not result.errors:
+            self.response_cache.set(key, result.data)
+        result.extensions = {**(result.extensions or {}), "responseCache": "MISS"}
+        return result
+
+    def get_execute_options(self, request, variables, operation_name):
+        execute_options = {
+            "root_value": self.get_root_value(request),
+            "context_value": self.get_context(request),
+            "variable_values": variables,
+            "operation_name": operation_name,
+            "middleware": self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            execute_options["execution_context_class"] = self.execution_context_class
+        return execute_options
+
+    def execute_document(self, request, document, operation_ast, variables, operation_name):
+        is_mutation = (
+            operation_ast is not None and operation_ast.operation == OperationType.MUTATION
+        )
+        if is_mutation:
+            # Rows loaded by earlier operations of a batch may be about to
+            # change, so the mutation and whatever follows it load afresh.
+            request.loaders = None
+        try:
+            execute_options = self.get_execute_options(request, variables, operation_name)
+
+            if is_mutation and (
+                graphene_settings.ATOMIC_MUTATIONS is True
+                or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+            ):
+                with transaction.atomic():
+                    result = execute(self.schema.graphql_schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+            else:
+                result = execute(self.schema.graphql_schema, document, **execute_options)
+        except Exception as e:
+            result = ExecutionResult(errors=[e])
+
+        if is_mutation:
+            request.loaders = None
+        return result
+
+    @staticmethod
+    def get_extensions(request, data):
+        extensions = request.GET.get("extensions") or data.get("extensions")
+        if extensions and isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+        return extensions
+
+
+class AsyncCRMGraphQLView(CRMGraphQLView):
+    """CRMGraphQLView for ASGI servers.
+
+    Queries run on graphql-core's async executor against a schema with async
+    resolvers, so a slow query waits on the database without holding a
+    worker thread. Mutations, and the cache lookups before execution, use
+    the synchronous ORM and cache APIs and run through ``sync_to_async``.
+    """
+
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.method.lower() not in ("get", "post"):
+                raise HttpError(
+                    HttpResponseNotAllowed(
+                        ["GET", "POST"], "GraphQL only supports GET and POST requests."
+                    )
+                )
+
+            data = self.parse_body(request)
+            if self.graphiql and self.can_display_graphiql(request, data):
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+            if self.batch:
+                responses = [await self.get_response_async(request, entry) for entry in data]
+                result = "[{}]".format(
+                    ",".join([response[0] for response in responses])
+                )
+                status_code = (
+                    responses
+                    and max(responses, key=lambda response: response[1])[1]
+                    or 200
+                )
+            else:
+                result, status_code = await self.get_response_async(request, data)
+
+            return HttpResponse(
+                status=status_code, content=result, content_type="application/json"
+            )
+
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(
+                request, {"errors": [self.format_error(e)]}
+            )
+            return response
+
+    async def get_response_async(self, request, data):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        execution_result = await self.execute_graphql_request_async(
+            request, data, query, variables, operation_name
+        )
+        return self.format_response(request, execution_result, id)
+
+    async def execute_graphql_request_async(self, request, data, query, variables, operation_name):
+        slow_log = SlowLog(variables)
+        with OperationMetrics() as metrics, slow_log:
+            document, operation_ast, cost, result = await sync_to_async(self.prepare_request)(
+                request, data, query, variables, operation_name
+            )
+            metrics.operation_ast = slow_log.operation_ast = operation_ast
+            slow_log.document = document
+            if document is not None:
+                result = await self.execute_prepared_async(
+                    request, document, operation_ast, cost, variables, operation_name
+                )
+            metrics.result = slow_log.result = result
+        if slow_log.exceeded:
+            # EXPLAIN, if enabled, needs the ORM's thread.
+            await sync_to_async(slow_log.emit)()
+        return result
+
+    async def execute_prepared_async(
+        self, request, document, operation_ast, cost, variables, operation_name
+    ):
+        trace = self.start_trace(request, operation_name)
+        if trace is not None:
+            # On the thread the ORM calls of this request run on.
+            await sync_to_async(trace.install)()
+        try:
+            if operation_ast is None or operation_ast.operation != OperationType.QUERY:
+                result = await sync_to_async(self.execute_document)(
+                    request, document, operation_ast, variables, operation_name
+                )
+            elif self.use_response_cache(operation_ast):
+                result = await self.execute_cached_async(
+                    request, document, operation_ast, variables, operation_name
+                )
+            else:
+                result = await self.execute_document_async(request, document, variables, operation_name)
+        finally:
+            if trace is not None:
+                await sync_to_async(trace.uninstall)()
+        result.extensions = {**(result.extensions or {}), "cost": cost}
+        if trace is not None:
+            self.finish_trace(request, trace, result)
+        return result
+
+    async def execute_cached_async(self, request, document, operation_ast, variables, operation_name):
+        key = await sync_to_async(self.response_cache.key)(
+            self.schema.graphql_schema, document, variables, operation_name
+        )
+        data = await sync_to_async(self.response_cache.get)(key)
+        record_cache_lookup("response", data is not None)
+        if data is not None:
+            return ExecutionResult(data=data, extensions={"responseCache": "HIT"})
+
+        result = await self.execute_document_async(request, document, variables, operation_name)
+        if not result.errors:
+            await sync_to_async(self.response_cache.set)(key, result.data)
+        result.extensions = {**(result.extensions or {}), "responseCache": "MISS"}
+        return result
+
+    async def execute_document_async(self, request, document, variables, operation_name):
+        # Relations the optimizer didn't prefetch are loaded with awaitables.
+        if getattr(request, "loaders", None) is None:
+            request.loaders = Loaders(asynchronous=True)
+        try:
+            result = execute(
+                self.schema.graphql_schema,
+                document,
+                **self.get_execute_options(request, variables, operation_name),
+            )
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+
+@require_GET
+def metrics_view(request):
+    """Prometheus text exposition of the crm_graphql_* metrics.
+
+    Under gunicorn, point PROMETHEUS_MULTIPROC_DIR at an empty directory
+    before the workers start so every worker's values are added up, and
+    call prometheus_client.multiprocess.mark_process_dead(worker.pid) from
+    the child_exit server hook.
+    """
+    content, content_type = render()
+    return HttpResponse(content, content_type=content_type)
@@ -1,10 +1,10 @@
 import graphene
 from graphene_django import DjangoObjectType
-from django.db import transaction
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
 import re
-from .models import Customer, Product, Order
+from crm.models import Customer, Product, Order
+from crm.bulk import bulk_create_customers, bulk_create_orders
 
 # Type Definitions
 class CustomerType(DjangoObjectType):
@@ -107,25 +107,9 @@ class BulkCreateCustomers(graphene.Mutation):
     Output = BulkCustomerResponse
 
     def mutate(self, info, inputs):
-        customers = []
-        errors = []
-        
-        with transaction.atomic():
-            for idx, input in enumerate(inputs):
-                try:
-                    validate_email(input.email)
-                    CreateCustomer.validate_phone(input.phone)
-                    
-                    customer = Customer(
-                        name=input.name,
-                        email=input.email,
-                        phone=input.phone
-                    )
-                    customer.full_clean()
-                    customer.save()
-                    customers.append(customer)
-                except Exception as e:
-                    errors.append(f"Row {idx + 1}: {str(e)}")
+        # Validated in memory and inserted with bulk_create; see crm/bulk.py
+        customers, failures = bulk_create_customers(inputs)
+        errors = [f"Row {idx + 1}: {message}" for idx, input, message in failures]
         
         return BulkCustomerResponse(
             customers=customers,
@@ -278,25 +262,12 @@ class BulkCreateCustomers(graphene.Mutation):
     error_count = graphene.Int()
 
     def mutate(self, info, inputs):
-        customers = []
-        errors = []
-        
-        with transaction.atomic():
-            for input in inputs:
-                try:
-                    validate_email(input.email)
-                    CreateCustomer.validate_phone(input.phone)
-                    
-                    customer = Customer(
-                        name=input.name,
-                        email=input.email,
-                        phone=input.phone
-                    )
-                    customer.full_clean()
-                    customer.save()
-                    customers.append(customer)
-                except Exception as e:
-                    errors.append(f"Failed to create customer {input.name}: {str(e)}")
+        # Validated in memory and inserted with bulk_create; see crm/bulk.py
+        customers, failures = bulk_create_customers(inputs)
+        errors = [
+            f"Failed to create customer {input.name}: {message}"
+            for idx, input, message in failures
+        ]
         
         return BulkCreateCustomers(
             customers=customers,
@@ -389,8 +360,30 @@ class CreateOrder(graphene.Mutation):
                 success=False
             )
 
+class BulkCreateOrders(graphene.Mutation):
+    class Arguments:
+        inputs = graphene.List(OrderInput, required=True)
+
+    orders = graphene.List(OrderType)
+    errors = graphene.List(graphene.String)
+    success_count = graphene.Int()
+    error_count = graphene.Int()
+
+    def mutate(self, info, inputs):
+        # Two IN queries and two bulk_create calls for the whole batch; see crm/bulk.py
+        orders, failures = bulk_create_orders(inputs)
+        errors = [f"Order {idx + 1}: {message}" for idx, input, message in failures]
+        
+        return BulkCreateOrders(
+            orders=orders,
+            errors=errors,
+            success_count=len(orders),
+            error_count=len(errors)
+        )
+
 class Mutation(graphene.ObjectType):
     create_customer = CreateCustomer.Field()
     bulk_create_customers = BulkCreateCustomers.Field()
     create_product = CreateProduct.Field()
     create_order = CreateOrder.Field()
+    bulk_create_orders = BulkCreateOrders.Field()
@@ -1,34 +1,92 @@
-from django.db import models
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import models, router, transaction
 from django.core.validators import MinValueValidator
+from django.dispatch import Signal
+from django.utils import timezone
 
-class Customer(models.Model):
-    name = models.CharField(max_length=100)
-    email = models.EmailField(unique=True)
-    phone = models.CharField(max_length=20, blank=True, null=True)
+# Sent with sender=<model> after writes that bypass post_save/post_delete:
+# bulk_create(), QuerySet.update() and raw UPDATE statements. Deletes of
+# tracked models send it too, for models without post_delete receivers.
+rows_changed = Signal()
 
-    def __str__(self):
-        return self.name
+# Deltas collected by CrmStats.batched(), per thread.
+_pending_stats = threading.local()
 
-class Product(models.Model):
-    name = models.CharField(max_length=100)
-    price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
-    stock = models.IntegerField(default=0, validators=[MinValueValidator(0)])
 
-    def __str__(self):
-        return self.name
+class TrackedQuerySet(models.QuerySet):
+    """Reports bulk inserts, updates and deletes to CrmStats and rows_changed."""
 
-class Order(models.Model):
-    customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
-    products = models.ManyToManyField(Product)
-    order_date = models.DateTimeField(auto_now_add=True)
-    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+                # The rows that were really inserted are unknown, so recount.
+                self.model.recount()
+            else:
+                self.model.record_created(objs)
+            rows_changed.send(sender=self.model)
+        return objs
 
-    def __str__(self):
-        return f"Order #{self.id} by {self.customer.name}"
-from django.db import models
-from django.core.validators import MinValueValidator
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = super().update(**kwargs)
+            if self.model.STATS_FIELDS & kwargs.keys():
+                self.model.recount()
+            rows_changed.send(sender=self.model)
+        return rows
 
-class Customer(models.Model):
+    def delete(self):
+        # Cascaded rows report themselves through post_delete (crm/signals.py);
+        # batching turns those reports into a single counter UPDATE.
+        with transaction.atomic(using=self.db, savepoint=False), CrmStats.batched():
+            deleted = super().delete()
+            rows_changed.send(sender=self.model)
+        return deleted
+
+
+class TrackedModel(models.Model):
+    """A model whose writes are reported to CrmStats and the response cache.
+
+    Subclasses that are counted in CrmStats override the record_* hooks.
+    """
+
+    STATS_FIELDS = frozenset()
+
+    objects = TrackedQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+            self.record_saved(adding)
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False), CrmStats.batched():
+            deleted = super().delete(*args, **kwargs)
+            rows_changed.send(sender=type(self))
+        return deleted
+
+    @classmethod
+    def recount(cls):
+        pass
+
+    @classmethod
+    def record_created(cls, objs):
+        pass
+
+    def record_saved(self, adding):
+        pass
+
+
+class Customer(TrackedModel):
     name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
@@ -36,19 +94,189 @@ class Customer(models.Model):
     def __str__(self):
         return self.name
 
-class Product(models.Model):
+    @classmethod
+    def inactive(cls, since):
+        """Customers with no order placed on or after ``since``."""
+        recent_orders = Order.objects.filter(customer=models.OuterRef('pk'), order_date__gte=since)
+        return cls.objects.filter(~models.Exists(recent_orders))
+
+    @classmethod
+    def recount(cls):
+        CrmStats.rebuild()
+
+    @classmethod
+    def record_created(cls, objs):
+        CrmStats.record(customers=len(objs))
+
+    def record_saved(self, adding):
+        if adding:
+            CrmStats.record(customers=1)
+
+
+class Product(TrackedModel):
     name = models.CharField(max_length=100)
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0.01)])
     stock = models.IntegerField(default=0, validators=[MinValueValidator(0)])
 
+    class Meta:
+        indexes = [
+            # The low-stock sweep: WHERE stock < threshold.
+            models.Index(fields=['stock'], name='crm_product_stock_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
-class Order(models.Model):
-    customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
-    products = models.ManyToManyField(Product)
-    order_date = models.DateTimeField(auto_now_add=True)
+
+class Order(TrackedModel):
+    STATS_FIELDS = frozenset({'total_amount'})
+
+    # Lookups by customer use the (customer, order_date) index below.
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, db_index=False)
+    products = models.ManyToManyField(Product, through='OrderProduct')
+    order_date = models.DateTimeField(auto_now_add=True, db_index=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            # A customer's orders by date, and the inactive-customer check.
+            models.Index(fields=['customer', 'order_date'], name='crm_order_customer_date_idx'),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} by {self.customer.name}"
+
+    @classmethod
+    def recount(cls):
+        CrmStats.rebuild()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so that a later save() can book the change in revenue.
+        instance._saved_total_amount = instance.__dict__.get('total_amount')
+        return instance
+
+    @classmethod
+    def record_created(cls, objs):
+        CrmStats.record(
+            orders=len(objs),
+            revenue=sum((Decimal(order.total_amount) for order in objs), Decimal('0')),
+        )
+
+    def record_saved(self, adding):
+        if adding:
+            CrmStats.record(orders=1, revenue=Decimal(self.total_amount))
+        elif getattr(self, '_saved_total_amount', None) is not None and 'total_amount' in self.__dict__:
+            CrmStats.record(revenue=Decimal(self.total_amount) - self._saved_total_amount)
+        self._saved_total_amount = self.__dict__.get('total_amount')
+
+
+class OrderProduct(TrackedModel):
+    """The rows behind Order.products, in the table Django created for it.
+
+    Tracked so that direct writes to the order lines, not only changes
+    through Order.products, expire the cached responses that read them.
+    """
+    # Lookups by order use the unique (order, product) constraint and
+    # lookups by product the (product, order) index.
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, db_index=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        db_table = 'crm_order_products'
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'product'], name='crm_order_products_order_product_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'order'], name='crm_orderproduct_product_idx'),
+        ]
+
+
+class CrmStats(models.Model):
+    """Running totals behind totalCustomers, totalOrders and totalRevenue.
+
+    A single row, changed in the same transaction as every Customer and
+    Order insert or delete so the dashboard fields never need to scan the
+    tables. ``manage.py rebuild_crm_stats`` recomputes it from scratch.
+    """
+    customer_count = models.BigIntegerField(default=0)
+    order_count = models.BigIntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'CRM stats'
+
+    @classmethod
+    def current(cls):
+        return cls.objects.filter(pk=1).first() or cls.rebuild()
+
+    @classmethod
+    def measure(cls):
+        """Count the real tables."""
+        totals = Order.objects.aggregate(count=models.Count('pk'), revenue=models.Sum('total_amount'))
+        return {
+            'customer_count': Customer.objects.count(),
+            'order_count': totals['count'],
+            'total_revenue': totals['revenue'] or Decimal('0'),
+        }
+
+    @classmethod
+    def rebuild(cls):
+        stats, _ = cls.objects.update_or_create(pk=1, defaults=cls.measure())
+        return stats
+
+    @classmethod
+    async def acurrent(cls):
+        return await cls.objects.filter(pk=1).afirst() or await cls.arebuild()
+
+    @classmethod
+    async def ameasure(cls):
+        totals = await Order.objects.aaggregate(count=models.Count('pk'), revenue=models.Sum('total_amount'))
+        return {
+            'customer_count': await Customer.objects.acount(),
+            'order_count': totals['count'],
+            'total_revenue': totals['revenue'] or Decimal('0'),
+        }
+
+    @classmethod
+    async def arebuild(cls):
+        stats, _ = await cls.objects.aupdate_or_create(pk=1, defaults=await cls.ameasure())
+        return stats
+
+    @classmethod
+    def record(cls, customers=0, orders=0, revenue=0):
+        delta = getattr(_pending_stats, 'delta', None)
+        if delta is not None:
+            delta['customers'] += customers
+            delta['orders'] += orders
+            delta['revenue'] += revenue
+            return
+        if not (customers or orders or revenue):
+            return
+        updated = cls.objects.filter(pk=1).update(
+            customer_count=models.F('customer_count') + customers,
+            order_count=models.F('order_count') + orders,
+            total_revenue=models.F('total_revenue') + revenue,
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            # First change ever: the tables already include it, so count them.
+            cls.rebuild()
+
+    @classmethod
+    @contextmanager
+    def batched(cls):
+        """Collect the deltas recorded inside the block and apply them once on exit."""
+        if getattr(_pending_stats, 'delta', None) is not None:
+            yield
+            return
+        _pending_stats.delta = {'customers': 0, 'orders': 0, 'revenue': Decimal('0')}
+        try:
+            yield
+            delta = _pending_stats.delta
+            _pending_stats.delta = None
+            cls.record(**delta)
+        finally:
+            _pending_stats.delta = None
@@ -1,95 +1,279 @@
+"""Seed the CRM database with generated customers, products and orders.
+
+    python seed_db.py --customers 100000 --products 5000 --orders 2000000 --seed 42
+
+Rows are generated by a pool of worker processes, one chunk at a time, and
+inserted by this process with chunked bulk_create as the chunks arrive.
+Every chunk draws from its own generator, seeded from --seed and the
+chunk's position, so a seed always yields the same rows whatever the
+number of workers.
+"""
+import argparse
 import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from multiprocessing import Pool
+
 import django
-from django.db import transaction
 from faker import Faker
-from decimal import Decimal
 
 # Set up Django environment
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql_crm.settings')
-django.setup()
 
-from crm.models import Customer, Product, Order
+PRODUCT_NAMES = [
+    "Laptop", "Smartphone", "Headphones", "Monitor", "Keyboard",
+    "Mouse", "Tablet", "Smartwatch", "Printer", "Router",
+    "External HDD", "USB Drive", "Webcam", "Microphone", "Speaker"
+]
 
-fake = Faker()
+# Rows generated per worker task.
+CHUNK_SIZE = 10000
 
-def create_customers(count=10):
-    """Generate fake customers with unique emails"""
-    customers = []
-    for _ in range(count):
-        email = fake.unique.email()
+# Rows per INSERT statement.
+BATCH_SIZE = 500
+
+# Orders are spread over this many days before now.
+ORDER_HISTORY_DAYS = 2 * 365
+
+
+def _faker(seed, kind, chunk):
+    fake = Faker()
+    fake.seed_instance(f"{seed}:{kind}:{chunk}")
+    return fake
+
+
+def _chunks(count):
+    for chunk, start in enumerate(range(0, count, CHUNK_SIZE)):
+        yield chunk, start, min(CHUNK_SIZE, count - start)
+
+
+def generate_customers(seed, chunk, start, count, first_number=0):
+    """``(name, email, phone)`` rows; the row number keeps every email unique.
+
+    Rows are numbered from ``first_number``, so that rows appended to a
+    seeded database don't repeat its emails.
+    """
+    fake = _faker(seed, "customers", chunk)
+    rows = []
+    for number in range(first_number + start, first_number + start + count):
         phone = None
         if fake.boolean(chance_of_getting_true=70):  # 70% chance of having phone
-            phone = f"+1{fake.msisdn()[3:]}" if fake.boolean() else fake.phone_number()
-        
-        customer = Customer(
-            name=fake.name(),
-            email=email,
-            phone=phone
+            phone = fake.numerify("+1##########") if fake.boolean() else fake.numerify("###-###-####")
+        rows.append((
+            fake.name(),
+            f"{fake.user_name()}.{number}@{fake.free_email_domain()}",
+            phone,
+        ))
+    return rows
+
+
+def generate_products(seed, chunk, start, count):
+    """``(name, price, stock)`` rows with realistic prices."""
+    fake = _faker(seed, "products", chunk)
+    return [
+        (
+            f"{fake.color_name()} {fake.random_element(PRODUCT_NAMES)}",
+            Decimal(fake.random_int(min=100, max=99999)) / 100,
+            fake.random_int(min=0, max=100),
         )
-        customers.append(customer)
-    
-    Customer.objects.bulk_create(customers)
-    return customers
-
-def create_products(count=15):
-    """Generate fake products with realistic prices"""
-    product_names = [
-        "Laptop", "Smartphone", "Headphones", "Monitor", "Keyboard",
-        "Mouse", "Tablet", "Smartwatch", "Printer", "Router",
-        "External HDD", "USB Drive", "Webcam", "Microphone", "Speaker"
+        for _ in range(count)
     ]
-    
-    products = []
-    for name in product_names[:count]:
-        product = Product(
-            name=name,
-            price=Decimal(fake.pydecimal(left_digits=3, right_digits=2, positive=True)),
-            stock=fake.random_int(min=0, max=100)
-        )
-        products.append(product)
-    
-    Product.objects.bulk_create(products)
-    return products
 
-def create_orders(customers, products, count=20):
-    """Generate orders with random products"""
+
+# Set in each order worker by _init_order_worker.
+_customer_count = 0
+_prices = []
+
+
+def _init_order_worker(customer_count, prices):
+    global _customer_count, _prices
+    _customer_count = customer_count
+    _prices = prices
+
+
+def generate_orders(seed, chunk, start, count, products_per_order):
+    """``(customer index, minutes before now, total, product indexes)`` rows."""
+    rng = random.Random(f"{seed}:orders:{chunk}")
+    rows = []
     for _ in range(count):
-        customer = fake.random_element(customers)
-        order_products = fake.random_elements(
-            elements=products,
-            length=fake.random_int(min=1, max=5),
-            unique=True
-        )
-        
-        total = sum(p.price for p in order_products)
-        order = Order.objects.create(
-            customer=customer,
-            total_amount=total
+        products = rng.sample(range(len(_prices)), rng.randint(1, min(products_per_order, len(_prices))))
+        rows.append((
+            rng.randrange(_customer_count),
+            rng.randrange(ORDER_HISTORY_DAYS * 24 * 60),
+            sum((_prices[index] for index in products), Decimal("0")),
+            products,
+        ))
+    return rows
+
+
+def _call(task):
+    function, args = task
+    return function(*args)
+
+
+def _generate(pool, function, count, seed, *args):
+    """Yield ``function``'s rows chunk by chunk, in order, from ``pool`` if there is one."""
+    tasks = [(function, (seed, chunk, start, size) + args) for chunk, start, size in _chunks(count)]
+    return map(_call, tasks) if pool is None else pool.imap(_call, tasks)
+
+
+@contextmanager
+def explicit_order_dates():
+    """Let bulk_create keep the order_date it is given instead of stamping now()."""
+    from crm.models import Order
+
+    field = Order._meta.get_field("order_date")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def clear_database():
+    """Empty the CRM tables with one DELETE each, instead of collecting every row."""
+    from django.db import connection
+    from crm.models import CrmStats, Customer, Order, OrderProduct, Product, rows_changed
+
+    with connection.cursor() as cursor:
+        for model in (OrderProduct, Order, Customer, Product):
+            cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+    for model in (Order, Customer, Product):
+        rows_changed.send(sender=model)
+    CrmStats.rebuild()
+
+
+def _report(label, count, start):
+    elapsed = time.monotonic() - start
+    print(f"- {label}: {count} in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.0f}/s)")
+
+
+def seed(customers=10, products=15, orders=20, seed=0, workers=None, products_per_order=5, clear=True):
+    """Generate and insert the requested numbers of rows; see the module docstring."""
+    from django.db import transaction
+    from django.db.models import Max
+    from django.utils import timezone
+    from crm.models import CrmStats, Customer, Order, OrderProduct, Product
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    now = timezone.now()
+
+    with transaction.atomic():
+        if clear:
+            print("Deleting old data...")
+            clear_database()
+
+        pool = Pool(workers) if workers > 1 else None
+        try:
+            print("Creating customers...")
+            start = time.monotonic()
+            customer_ids = []
+            # Numbered past every existing customer; ids are never reused.
+            first_number = Customer.objects.aggregate(last=Max("pk"))["last"] or 0
+            for rows in _generate(pool, generate_customers, customers, seed, first_number):
+                created = Customer.objects.bulk_create(
+                    [Customer(name=name, email=email, phone=phone) for name, email, phone in rows],
+                    batch_size=BATCH_SIZE,
+                )
+                customer_ids.extend(customer.pk for customer in created)
+            _report("Customers", len(customer_ids), start)
+
+            print("Creating products...")
+            start = time.monotonic()
+            product_ids = []
+            prices = []
+            for rows in _generate(pool, generate_products, products, seed):
+                created = Product.objects.bulk_create(
+                    [Product(name=name, price=price, stock=stock) for name, price, stock in rows],
+                    batch_size=BATCH_SIZE,
+                )
+                product_ids.extend(product.pk for product in created)
+                prices.extend(price for _, price, _ in rows)
+            _report("Products", len(product_ids), start)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        if orders and not (customer_ids and product_ids):
+            raise ValueError("Orders need at least one customer and one product")
+
+        print("Creating orders...")
+        start = time.monotonic()
+        # Order workers need the product prices to compute the order totals.
+        _init_order_worker(len(customer_ids), prices)
+        pool = Pool(workers, _init_order_worker, (len(customer_ids), prices)) if workers > 1 else None
+        created = 0
+        try:
+            with explicit_order_dates():
+                for rows in _generate(pool, generate_orders, orders, seed, products_per_order):
+                    chunk = Order.objects.bulk_create(
+                        [
+                            Order(
+                                customer_id=customer_ids[customer],
+                                order_date=now - timedelta(minutes=minutes),
+                                total_amount=total,
+                            )
+                            for customer, minutes, total, _ in rows
+                        ],
+                        batch_size=BATCH_SIZE,
+                    )
+                    OrderProduct.objects.bulk_create(
+                        [
+                            OrderProduct(order_id=order.pk, product_id=product_ids[product])
+                            for order, (_, _, _, order_products) in zip(chunk, rows)
+                            for product in order_products
+                        ],
+                        batch_size=BATCH_SIZE,
+                    )
+                    created += len(chunk)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        _report("Orders", created, start)
+
+        CrmStats.rebuild()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--customers", type=int, default=10)
+    parser.add_argument("--products", type=int, default=15)
+    parser.add_argument("--orders", type=int, default=20)
+    parser.add_argument("--products-per-order", type=int, default=5,
+                        help="most products in one order (default 5)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default 0)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes generating rows (default: one per CPU)")
+    parser.add_argument("--append", action="store_true", help="keep the existing rows")
+    args = parser.parse_args()
+    if min(args.customers, args.products, args.orders) < 0:
+        parser.error("row counts must not be negative")
+    if args.products_per_order < 1 or args.workers < 1:
+        parser.error("--products-per-order and --workers must be at least 1")
+
+    django.setup()
+    start = time.monotonic()
+    try:
+        seed(
+            customers=args.customers,
+            products=args.products,
+            orders=args.orders,
+            seed=args.seed,
+            workers=args.workers,
+            products_per_order=args.products_per_order,
+            clear=not args.append,
         )
-        order.products.set(order_products)
-
-@transaction.atomic
-def seed_database():
-    print("Deleting old data...")
-    Order.objects.all().delete()
-    Customer.objects.all().delete()
-    Product.objects.all().delete()
-    
-    print("Creating customers...")
-    customers = create_customers()
-    
-    print("Creating products...")
-    products = create_products()
-    
-    print("Creating orders...")
-    create_orders(customers, products)
-    
-    print(f"""
-    Database seeded successfully!
-    - Customers: {len(customers)}
-    - Products: {len(products)}
-    - Orders: {Order.objects.count()}
-    """)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"Database seeded successfully in {time.monotonic() - start:.1f}s")
+
 
 if __name__ == '__main__':
-    seed_database()
+    main()